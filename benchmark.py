@@ -0,0 +1,526 @@
+# Modules
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import logging
+
+# run without a window unless a display is asked for
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+logger = logging.getLogger(__name__)
+
+# creates a headless game with a single keyboard player near the bottom of the screen
+def create_game(seed=0, settings=None):
+    from main import Game
+
+    # each game opens its own display
+    pygame.quit()
+    random.seed(seed)
+    game = Game()
+    # quality stays fixed so numbers can be compared between runs
+    settings = {"adaptiveQuality": False, **(settings or {})}
+    for key, value in settings.items():
+        setattr(game.settings, key, value)
+    game.detect_inputs()
+    game.start_game()
+    game.players.sprites()[0].transform.y = game.get_world_size()[1] - 40
+    return game
+
+# presses keys on a fixed pattern so that the player moves, dashes and shoots
+def autoplay(game, frame):
+    controls = game.settings.keyboard
+    pattern = {
+        5: (pygame.KEYDOWN, controls.shoot),
+        20: (pygame.KEYUP, controls.shoot),
+    }
+    if frame % 30 in pattern:
+        event, key = pattern[frame % 30]
+        pygame.event.post(pygame.event.Event(event, key=key))
+    if frame % 200 == 100:
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=controls.moveRight))
+    if frame % 200 == 150:
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=controls.moveRight))
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=controls.moveLeft))
+    if frame % 200 == 199:
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=controls.moveLeft))
+    if frame % 90 == 45:
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=controls.dash))
+    if frame % 120 == 60:
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=controls.swapWeapon))
+
+# runs a number of frames at a fixed timestep, restarting whenever the player dies
+def run_frames(game, frames, dt, callback=None):
+    start = time.perf_counter()
+    for frame in range(frames):
+        autoplay(game, frame)
+        game.dt = dt
+        game.event_handler()
+        game.update()
+        game.draw()
+        if callback:
+            callback(game, frame)
+        if game.state == "dead":
+            game.start_game()
+            game.players.sprites()[0].transform.y = game.get_world_size()[1] - 40
+    return time.perf_counter() - start
+
+# reports how many collision tests each tier runs per frame
+def bench_collisions(args):
+    for fidelity in ("exact", "approximate"):
+        game = create_game(args.seed, {"collisionFidelity": fidelity})
+        game.collisions.fidelity = fidelity
+        totals = {tier: 0 for tier in game.collisions.stats}
+        peaks = {tier: 0 for tier in game.collisions.stats}
+
+        def record(game, frame):
+            for tier, count in game.collisions.stats.items():
+                totals[tier] += count
+                peaks[tier] = max(peaks[tier], count)
+
+        elapsed = run_frames(game, args.frames, 1 / 60, record)
+        print(f"collisions ({fidelity}) {args.frames} frames in {elapsed:.2f}s")
+        for tier in totals:
+            print(f"  {tier:<8} {totals[tier] / args.frames:8.2f} tests/frame  (peak {peaks[tier]})")
+
+# fires a volley of projectiles at a row of asteroids and ufos and returns how many of them hit
+def fire_volley(game, dt, sweep):
+    from scripts.entities import Asteroid, UFO
+
+    game.start_game()
+    game.collisions.sweep = sweep
+    width, height = game.get_world_size()
+    for player in game.players:
+        player.kill()
+
+    # targets that cannot be destroyed or move, so every projectile has something to hit
+    for count, x in enumerate(range(10, width - 40, 45)):
+        if count % 2:
+            target = UFO((x, 80), game.archetypes["ufo"], game.assets)
+            game.ufos.add(target)
+        else:
+            target = Asteroid((x, 60), game.archetypes["asteroid"], game.assets)
+            target.health = float("inf")
+            target.game = game
+            game.asteroids.add(target)
+        game.add_to_world(target)
+
+    projectiles = []
+    for target in [*game.asteroids, *game.ufos]:
+        for count, template in enumerate((game.DEFAULT_PROJECTILE, game.PIERCING_PROJECTILE, game.SPREADING_PROJECTILE, game.MISSILE)):
+            bullet = template.copy()
+            bullet.start((target.rect.centerx - bullet.width / 2, height - 20 - count * 7))
+            bullet.timers = game.timers
+            bullet.lifetime = None
+            bullet.attach_mover(game.movers, bullet.movement * bullet.speed)
+            game.projectiles.add(bullet)
+            game.add_to_world(bullet)
+            projectiles.append(bullet)
+
+    hits = set()
+    for _ in range(int(1.5 / dt)):
+        game.movers.update(dt, game.get_world_size())
+        game.kinetics.advance(dt, game)
+        game.timers.advance(dt)
+        game.spatial.rebuild(game.projectiles, game.asteroids, game.ufos)
+        game.collisions.update(game.spatial)
+        for pair in game.collisions.contacts:
+            hits.update(entity for entity in pair if entity in projectiles)
+        game.registry.flush()
+    return len(hits), len(projectiles)
+
+# checks that projectile hit rates stay the same as the tick rate drops
+def bench_swept(args):
+    game = create_game(args.seed)
+    for tickRate in (240, 120, 60, 30, 15, 8, 4):
+        results = []
+        for sweep in (True, False):
+            hits, fired = fire_volley(game, 1 / tickRate, sweep)
+            results.append(f"{'swept' if sweep else 'sampled'} {hits}/{fired} ({hits / fired:.0%})")
+        print(f"swept {tickRate:>4} ticks/s  " + "  ".join(results))
+
+# compares spatial queries on the grid against scanning every entity
+def bench_spatial(args):
+    from scripts.entities import Asteroid
+    from scripts.spatial import SpatialGrid
+
+    game = create_game(args.seed)
+    for count in (100, 1000, 5000):
+        size = int((count * 2500) ** 0.5)
+        asteroids = [Asteroid((random.uniform(0, size), random.uniform(0, size)), game.archetypes["asteroid"], game.assets) for _ in range(count)]
+        points = [(random.uniform(0, size), random.uniform(0, size)) for _ in range(500)]
+        grid = SpatialGrid()
+
+        start = time.perf_counter()
+        grid.rebuild(asteroids)
+        rebuild = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for point in points:
+            min(asteroids, key=lambda asteroid: asteroid.get_distance(point))
+        bruteForce = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for point in points:
+            grid.nearest("asteroid", point)
+        nearest = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for point in points:
+            grid.within_radius("asteroid", point, 60)
+        radius = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for point in points:
+            grid.raycast(point, (random.uniform(-1, 1), random.uniform(-1, 1)), 300)
+        raycast = time.perf_counter() - start
+
+        perQuery = 1000000 / len(points)
+        print(f"spatial {count:>5} entities  rebuild {rebuild * 1000:6.2f}ms  scan {bruteForce * perQuery:7.1f}us  nearest {nearest * perQuery:6.1f}us  radius {radius * perQuery:6.1f}us  raycast {raycast * perQuery:6.1f}us")
+
+# reports the memory and spawn time of 10k entities of each archetype
+def bench_archetypes(args):
+    import gc
+    import tracemalloc
+    from scripts.entities import Asteroid, UFO
+
+    game = create_game(args.seed)
+    spawners = {
+        "lasarbeam": game.DEFAULT_PROJECTILE.copy,
+        "missile": game.MISSILE.copy,
+        "asteroid": lambda: Asteroid((0, 0), game.archetypes["asteroid"], game.assets),
+        "ufo": lambda: UFO((0, 0), game.archetypes["ufo"], game.assets),
+    }
+    for name, spawn in spawners.items():
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        entities = [spawn() for _ in range(10000)]
+        elapsed = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del entities
+        print(f"archetypes {name:<10} {memory / 1024 / 1024:6.2f} MiB per 10k  spawn {elapsed * 100:6.1f}us")
+
+# compares a large asteroid field with sleeping sectors against simulating every sector
+def bench_sectors(args):
+    from scripts.entities import Asteroid
+
+    for count in (500, 2000):
+        results = []
+        for sleeping in (True, False):
+            random.seed(args.seed)
+            game = create_game(args.seed)
+            screenWidth, screenHeight = game.get_screen_size()
+            game.settings.worldSize = (screenWidth * 8, screenHeight * 8)
+            game.window.world.bounds = game.settings.worldSize
+            game.start_game()
+            game.state = "benchmark"  # stops waves from spawning
+            if not sleeping:
+                game.sectors.wakeRadius = max(game.get_world_size()) // game.sectors.sectorSize + 1
+
+            width, height = game.get_world_size()
+            for _ in range(count):
+                asteroid = Asteroid((random.uniform(0, width), random.uniform(0, height)), game.archetypes["asteroid"], game.assets)
+                asteroid.game = game
+                asteroid.health = float("inf")
+                asteroid.attach_mover(game.movers, (random.uniform(-20, 20), random.uniform(-20, 20)), (width, height, width, height))
+                game.asteroids.add(asteroid)
+                game.add_to_world(asteroid)
+
+            awake = 0
+            def record(game, frame):
+                nonlocal awake
+                awake += game.sectors.stats["awake"]
+
+            elapsed = run_frames(game, args.frames, 1 / 60, record)
+            results.append(f"{'sleeping' if sleeping else 'all awake'} {elapsed / args.frames * 1000:6.2f}ms/frame ({awake / args.frames:6.1f} awake)")
+        print(f"sectors {count:>5} asteroids  " + "  ".join(results))
+
+# lets the quality governor react to the real frame time and reports every level it moves through
+def bench_quality(args):
+    game = create_game(args.seed, {"adaptiveQuality": True})
+    changes = []
+    frames = {level.name: 0 for level in game.governor.levels}
+    applyQuality = game.apply_quality
+
+    def on_change(level):
+        changes.append((frame, level.name, game.governor.changeAverage))
+        applyQuality(level)
+    game.governor.onChange = on_change
+
+    def record(game, current):
+        nonlocal frame
+        frame = current
+        frames[game.governor.current.name] += 1
+
+    frame = 0
+    elapsed = run_frames(game, args.frames, 1 / 60, record)
+    print(f"quality {args.frames} frames in {elapsed:.2f}s against a {game.governor.targetFrameTime * 1000:.2f}ms target")
+    for frame, name, average in changes:
+        print(f"  frame {frame:>5}  -> {name:<8} (average {average * 1000:.2f}ms)")
+    print("  " + "  ".join(f"{name} {count / args.frames:.0%}" for name, count in frames.items()))
+
+# times drawing a frame at every render scale the world camera supports
+def bench_render(args):
+    game = create_game(args.seed)
+    for renderScale in game.window.world.renderScales:
+        game = create_game(args.seed, {"renderScale": renderScale})
+        game.apply_quality(game.governor.current)
+        drawTime = 0
+        draw = game.draw
+
+        def timed_draw():
+            nonlocal drawTime
+            start = time.perf_counter()
+            draw()
+            drawTime += time.perf_counter() - start
+        game.draw = timed_draw
+
+        elapsed = run_frames(game, args.frames, 1 / 60)
+        width, height = game.window.worldScreen.get_size()
+        print(f"render {renderScale:>5} scale  {width}x{height}  draw {drawTime / args.frames * 1000:6.2f}ms/frame  total {elapsed / args.frames * 1000:6.2f}ms/frame")
+
+# compares drawing on the simulation thread against a pipelined render thread
+def bench_pipeline(args):
+    for threaded in (False, True):
+        game = create_game(args.seed)
+        game.renderer.threaded = threaded
+        latencies = []
+
+        def record(game, frame):
+            latencies.extend(game.renderer.latencies)
+            game.renderer.latencies.clear()
+
+        elapsed = run_frames(game, args.frames, 1 / 60, record)
+        game.renderer.finish()
+        game.renderer.stop()
+        latencies.extend(game.renderer.latencies)
+        latencies.sort()
+        median = latencies[len(latencies) // 2]
+        worst = latencies[int(len(latencies) * 0.99)]
+        print(f"pipeline {'threaded' if threaded else 'serial':<8}  {elapsed / args.frames * 1000:6.2f}ms/frame ({args.frames / elapsed:6.1f} fps)  input latency median {median * 1000:6.2f}ms  p99 {worst * 1000:6.2f}ms")
+
+# times the phases split over the job system at different worker counts, and checks they all play out the same
+def bench_jobs(args):
+    from scripts.entities import Asteroid
+
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        random.seed(args.seed)
+        game = create_game(args.seed, {"jobWorkers": workers})
+        game.set_job_workers(workers)
+        game.state = "benchmark"  # stops waves from spawning
+        for player in game.players:
+            player.kill()
+        game.registry.flush()
+
+        width, height = game.get_world_size()
+        for _ in range(1000):
+            asteroid = Asteroid((random.uniform(0, width), random.uniform(0, height)), game.archetypes["asteroid"], game.assets)
+            asteroid.game = game
+            asteroid.health = float("inf")
+            asteroid.attach_mover(game.movers, (random.uniform(-5, 5), random.uniform(-5, 5)), (width, height, width, height))
+            game.asteroids.add(asteroid)
+            game.add_to_world(asteroid)
+
+        contacts = 0
+        def fire(game, frame):
+            nonlocal contacts
+            contacts += len(game.collisions.contacts)
+            for _ in range(10):
+                bullet = game.DEFAULT_PROJECTILE.copy()
+                bullet.start((random.uniform(0, width), height - 10))
+                bullet.timers = game.timers
+                bullet.attach_mover(game.movers, bullet.movement * bullet.speed)
+                game.projectiles.add(bullet)
+                game.add_to_world(bullet)
+
+        game.jobs.reset_timings()
+        elapsed = run_frames(game, args.frames, 1 / 60, fire)
+        game.jobs.shutdown()
+        phases = "  ".join(f"{phase} {seconds / args.frames * 1000:6.2f}ms" for phase, seconds in sorted(game.jobs.timings.items()))
+        baseline = baseline or elapsed
+        print(f"jobs {workers} workers  {elapsed / args.frames * 1000:6.2f}ms/frame (x{baseline / elapsed:4.2f})  {phases}  contacts {contacts}")
+
+# reports how long inputs take to reach the display and which stage the time goes to
+def bench_latency(args):
+    from scripts.latency import STAGES
+
+    for threaded in (False, True):
+        game = create_game(args.seed)
+        game.renderer.threaded = threaded
+        game.latency.reset()
+        run_frames(game, args.frames, 1 / 60)
+        game.renderer.finish()
+        game.renderer.stop()
+        report = game.latency.report()
+        print(f"latency {'threaded' if threaded else 'serial'} over {len(game.latency.samples)} inputs (p50 / p90 / p99)")
+        for name in ("total", *STAGES):
+            print(f"  {name:<9} " + "  ".join(f"{value * 1000:7.2f}ms" for value in report[name].values()))
+
+# records frames from each source and reports what it costs the game loop and how many frames are dropped
+def bench_capture(args):
+    import shutil
+    import tempfile
+
+    directory = tempfile.mkdtemp(prefix="capture-")
+    try:
+        game = create_game(args.seed)
+        baseline = run_frames(game, args.frames, 1 / 60)
+        print(f"capture off      {baseline / args.frames * 1000:6.2f}ms/frame")
+        for source, format in (("world", "png"), ("display", "png"), ("world", "raw")):
+            game = create_game(args.seed, {"captureDirectory": directory, "captureFormat": format})
+            game.start_capture(source)
+            elapsed = run_frames(game, args.frames, 1 / 60)
+            recorder = game.recorder
+            game.stop_capture()
+            average = recorder.captureTime / max(1, recorder.captured)
+            print(f"capture {source:<7} {format}  {elapsed / args.frames * 1000:6.2f}ms/frame  capture {average * 1000:5.2f}ms average {recorder.maxCaptureTime * 1000:5.2f}ms max  {recorder.written} written  {recorder.dropped} dropped")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+# times each post effect at every quality level, with the screen kept shaking and flashing so every effect runs
+def bench_post(args):
+    from scripts.quality import QUALITY_LEVELS
+
+    for level in range(len(QUALITY_LEVELS)):
+        game = create_game(args.seed)
+        game.governor.set_level(level)
+
+        def excite(game, frame):
+            game.window.shake_screen(20)
+            game.window.flash_screen(0.3)
+
+        elapsed = run_frames(game, args.frames, 1 / 60, excite)
+        processor = game.window.postProcessor
+        costs = processor.costs()
+        total = sum(costs.values())
+        parts = "  ".join(f"{effect} {cost:5.2f}ms" for effect, cost in costs.items()) or "no effects"
+        print(f"post {game.governor.current.name:<8} {elapsed / args.frames * 1000:6.2f}ms/frame  effects {total:5.2f}ms/frame  {parts}")
+
+# times capturing and drawing only the background layers at every render scale
+def bench_background(args):
+    game = create_game(args.seed)
+    camera = game.window.world
+    for renderScale in camera.renderScales:
+        camera.set_render_scale(renderScale)
+        tiles = 0
+        start = time.perf_counter()
+        for frame in range(args.frames):
+            game.background.update(1 / 60)
+            camera.draw_background(game.background)
+            captured = camera.capture()
+            tiles += len(captured.commands) - 1
+            camera.render(captured)
+        elapsed = time.perf_counter() - start
+        print(f"background {renderScale:>5} scale  {len(game.background.layers)} layers  {tiles / args.frames:5.1f} tiles/frame  {elapsed / args.frames * 1000:6.3f}ms/frame")
+
+# times putting each layer of the frame together on the display
+def bench_composite(args):
+    game = create_game(args.seed)
+    elapsed = run_frames(game, args.frames, 1 / 60)
+    compositor = game.window.compositor
+    costs = compositor.costs()
+    parts = "  ".join(f"{layer} {cost:5.2f}ms" for layer, cost in costs.items())
+    print(f"composite {elapsed / args.frames * 1000:6.2f}ms/frame  layers {sum(costs.values()):5.2f}ms/frame  {parts}")
+
+# restarts from the death screen over and over and times each one until the new game is on the display
+def bench_restart(args):
+    game = create_game(args.seed)
+    restarts = max(1, args.frames // 60)
+    for restart in range(restarts):
+        run_frames(game, 50, 1 / 60)
+        # dies and spends a few frames on the death screen like a player would before clicking retry
+        game.state = "dead"
+        for frame in range(5):
+            game.dt = 1 / 60
+            game.update()
+            game.death_screen()
+            game.draw()
+        game.restart_game()
+        game.players.sprites()[0].transform.y = game.get_world_size()[1] - 40
+        run_frames(game, 1, 1 / 60)
+    times = sorted(game.restartTimes)
+    print(f"restart {len(times)} restarts  retry to first frame median {times[len(times) // 2] * 1000:6.2f}ms  max {times[-1] * 1000:6.2f}ms")
+
+# builds the sprite cache, opens it again like a fresh process would and compares its frames and masks to deriving them live
+def bench_spritecache(args):
+    from scripts.constants import BASE_IMG_PATH, ANIMATION_DATA_PATH
+    from scripts.spritecache import SpriteCache, QUARTER_TURNS
+
+    game = create_game(args.seed)
+    assets = game.assets
+    directory = tempfile.mkdtemp(prefix="spritecache-")
+    try:
+        start = time.perf_counter()
+        SpriteCache.load(assets, BASE_IMG_PATH, ANIMATION_DATA_PATH, directory)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        cache = SpriteCache.load(assets, BASE_IMG_PATH, ANIMATION_DATA_PATH, directory)
+        warm = time.perf_counter() - start
+        print(f"spritecache {cache.rows} variants  build and save {cold * 1000:7.2f}ms  open {warm * 1000:6.2f}ms")
+
+        variants = [(name, frame, turn * 90, flip) for name, animation in sorted(assets.items()) for frame in range(len(animation.images)) for turn in range(QUARTER_TURNS) for flip in (False, True)]
+        repeats = max(1, args.frames // 100)
+        start = time.perf_counter()
+        for repeat in range(repeats):
+            for name, frame, rotation, flip in variants:
+                image = pygame.transform.rotate(pygame.transform.flip(assets[name].images[frame], flip, False), rotation).convert_alpha()
+                pygame.mask.from_surface(image)
+        live = time.perf_counter() - start
+        start = time.perf_counter()
+        for repeat in range(repeats):
+            for name, frame, rotation, flip in variants:
+                spriteVariants = cache.variants(name)
+                spriteVariants.image(frame, rotation, flip)
+                spriteVariants.mask(frame, rotation, flip)
+        cached = time.perf_counter() - start
+        calls = repeats * len(variants)
+        print(f"spritecache image and mask  live {live / calls * 1e6:6.2f}us  cached {cached / calls * 1e6:6.2f}us  over {calls} lookups")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+BENCHMARKS = {
+    "collisions": bench_collisions,
+    "swept": bench_swept,
+    "spatial": bench_spatial,
+    "archetypes": bench_archetypes,
+    "sectors": bench_sectors,
+    "quality": bench_quality,
+    "render": bench_render,
+    "pipeline": bench_pipeline,
+    "jobs": bench_jobs,
+    "latency": bench_latency,
+    "capture": bench_capture,
+    "post": bench_post,
+    "background": bench_background,
+    "composite": bench_composite,
+    "restart": bench_restart,
+    "spritecache": bench_spritecache,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the game headless and reports performance numbers.")
+    parser.add_argument("benchmarks", nargs="*", help=f"benchmarks to run, all of them by default ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--frames", type=int, default=1200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+
+    logging.basicConfig(level=logging.WARNING)
+    for name in args.benchmarks or BENCHMARKS:
+        BENCHMARKS[name](args)
+
+if __name__ == "__main__":
+    main()
+    pygame.quit()
+    sys.exit()
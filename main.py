@@ -1,19 +1,44 @@
 # Modules
-import pygame
+import time
+import os
 import sys
+import argparse
 import logging
-from pygame.constants import *
+from collections import deque
 
 # Scripts
+from scripts.startup import StartupTimeline
+
+# started before anything slow is imported so the imports are on the timeline
+STARTUP = StartupTimeline()
+
+import pygame
+from pygame.constants import *
 from scripts.camera import Window
 from scripts.settings import Settings
-from scripts.entities import Player, ModifiedSpriteGroup, UFO, Background, Asteroid
-from scripts.animation import load_animations
+from scripts.entities import Player, UFO, Asteroid
+from scripts.background import BackgroundLayer, Starfield, ParallaxBackground
+from scripts.animation import load_animations, CLOCK as ANIMATION_CLOCK
 from scripts.input import Controller, Keyboard, controller_check
-from scripts.constants import BASE_IMG_PATH
-from scripts.projectile import *
-from scripts.particles import Particle, ParticleSystem
+from scripts.constants import BASE_IMG_PATH, ANIMATION_DATA_PATH
+from scripts.projectile import Projectile, Missile, PiercingProjectile, SpreadProjectile, Weapon, SpreadWeapon, BeamWeapon
+from scripts.particles import Particle, ParticleSystem, QUALITY as PARTICLE_QUALITY
 from scripts.waves import WaveSystem
+from scripts.movers import MoverStore
+from scripts.kinetics import KineticQueue
+from scripts.timers import TimerWheel
+from scripts.collisions import CollisionWorld
+from scripts.spatial import SpatialGrid
+from scripts.registry import EntityRegistry
+from scripts.archetypes import load_archetypes
+from scripts.sectors import SectorGrid
+from scripts.quality import QualityGovernor
+from scripts.pipeline import RenderPipeline
+from scripts.jobs import JobSystem
+from scripts.latency import LatencyTracker
+from scripts.capture import FrameRecorder
+from scripts.spritecache import SpriteCache
+from scripts.events import EventBus, AsteroidSpawned, AsteroidMissed, AsteroidDestroyed
 from scripts.menu import RectElement, UserInterface, AnimatedElement, TextElement, SurfaceElement, Group
 
 # configure the logger
@@ -27,38 +52,74 @@ logging.basicConfig(
 )
 
 logger = logging.getLogger(__name__)
+STARTUP.mark("imports")
 
 class Game():
-    def __init__(self):
-        logging.basicConfig(filename="data/game.log", level=logging.INFO)
-        pygame.init()
-        pygame.mixer.init()
+    def __init__(self, startup=None, profileStartup=False):
+        # only what the first frame needs is started here, the mixer and controllers wait until after it
+        self.startup = startup if startup is not None else StartupTimeline()
+        self.profileStartup = profileStartup  # logs the startup timeline once the first frame is presented
+        self.started = False
+        pygame.display.init()
         pygame.font.init()
-        pygame.joystick.init()
+        self.startup.mark("pygame init")
 
         # core properties
         self.settings = Settings()
-        self.window = Window(self.settings.resolution, flags=pygame.FULLSCREEN | pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.SCALED)
+        self.registry = EntityRegistry()
+        self.window = Window(self.settings.resolution, flags=pygame.FULLSCREEN | pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.SCALED, registry=self.registry)
         self.clock = pygame.time.Clock()
+        self.startup.mark("display")
         self.assets = load_animations(BASE_IMG_PATH)
+        self.archetypes = load_archetypes()
+        self.startup.mark("assets")
+        if self.settings.spriteCache is not None:
+            SpriteCache.load(self.assets, BASE_IMG_PATH, ANIMATION_DATA_PATH, self.settings.spriteCache).attach(self.assets)
+            self.startup.mark("sprite cache")
         self.inputDevices = []
         self.dt = 1
         self.state = "running"
 
-        # sprite groups
-        self.players = ModifiedSpriteGroup()
-        self.projectiles = ModifiedSpriteGroup()
-        self.ufos = ModifiedSpriteGroup()
-        self.asteroids = ModifiedSpriteGroup()
-        self.arrows = ModifiedSpriteGroup()
-        self.explosions = ModifiedSpriteGroup()
-        self.other = ModifiedSpriteGroup()
-        self.items = ModifiedSpriteGroup()
+        # sprite groups, all views over the registry
+        self.players = self.registry.group("players")
+        self.projectiles = self.registry.group("projectiles")
+        self.ufos = self.registry.group("ufos")
+        self.asteroids = self.registry.group("asteroids")
+        self.arrows = self.registry.group("arrows")
+        self.explosions = self.registry.group("explosions")
+        self.other = self.registry.group("other")
+        self.items = self.registry.group("items")
+
+        # gameplay events are delivered at the end of each tick
+        self.events = EventBus()
+        self.events.subscribe(AsteroidSpawned, self.on_asteroid_spawned)
+        self.events.subscribe(AsteroidMissed, self.on_asteroid_missed)
+        self.events.subscribe(AsteroidDestroyed, self.on_asteroid_destroyed)
+
+        # the data parallel phases of a tick can be split over worker threads
+        self.jobs = None
+
+        # asteroids and projectiles are moved in bulk and their exits are scheduled ahead of time
+        self.kinetics = KineticQueue()
+        self.movers = MoverStore(self.kinetics, self.get_world_size())
+
+        # every gameplay timer runs on one wheel
+        self.timers = TimerWheel()
+
+        # live entities are indexed once per tick for collisions and spatial queries
+        self.spatial = SpatialGrid()
+        self.collisions = CollisionWorld(fidelity=self.settings.collisionFidelity)
+        self.set_job_workers(self.settings.jobWorkers)
+
+        # only the sectors around the players are simulated fully
+        self.sectors = SectorGrid(self.get_world_size(), self.get_screen_size(), self.settings.sectorSize, self.settings.sectorWakeRadius)
+        if self.sectors.enabled:
+            self.window.world.bounds = self.get_world_size()
 
         # background
-        self.bgImage = pygame.image.load("data/bg.png")
-        self.background = Background((0, 0), self.bgImage, -10)
-        self.bgScroll = 1
+        self.background = ParallaxBackground(BackgroundLayer(pygame.image.load("data/bg.png"), velocity=(0, 75), opaque=True, camLayer=-10))
+        if self.settings.starfield:
+            self.background.add(Starfield(seed=1, scrollRate=1.25, velocity=(0, 120), camLayer=-9))
 
         self.asteroidsDestroyed = 0
         self.asteroidsMissed = 0
@@ -69,36 +130,62 @@ class Game():
         self.score = 0
 
         # weapons and projectiles
-        self.DEFAULT_PROJECTILE = Projectile((0, 0), (13, 13), "lasarbeam", self.assets, layer=0)
+        self.DEFAULT_PROJECTILE = Projectile((0, 0), self.archetypes["lasarbeam"], self.assets)
         self.DEFAULT_WEAPON = Weapon(50, 1, True, 0.1, self.DEFAULT_PROJECTILE, [[3, -5], [-16, -5]])
 
-        self.MISSILE = Missile((0, 0), (11, 31), "missile", self.assets)
+        self.MISSILE = Missile((0, 0), self.archetypes["missile"], self.assets)
         self.MISSILE_WEAPON = Weapon(5, 2, False, 0.7, self.MISSILE, [[7, 0]])
 
-        self.PIERCING_PROJECTILE = PiercingProjectile((0, 0), (13, 13), "piercing", self.assets, layer=0)
+        self.PIERCING_PROJECTILE = PiercingProjectile((0, 0), self.archetypes["piercing"], self.assets)
         self.PIERCING_WEAPON = Weapon(75, 0.5, True, 0.1, self.PIERCING_PROJECTILE, [[3, -5], [-16, -5]])
 
-        self.SPREADING_PROJECTILE = SpreadProjectile((0, 0), (13, 13), "spread", self.assets, layer=0)
+        self.SPREADING_PROJECTILE = SpreadProjectile((0, 0), self.archetypes["spread"], self.assets)
         self.SPREADING_WEAPON = SpreadWeapon(25, 0.7, True, 0.05, self.SPREADING_PROJECTILE, [[-3, 0]])
         
         self.BEAM_WEAPON = BeamWeapon(1, 50, 1, True, 0.2, self.DEFAULT_PROJECTILE, [[7, 0]])
         self.particles = ParticleSystem((0, 0))
+        self.startup.mark("world")
 
         # user interface elements
-        self.ui = UserInterface(self.get_world_size())
+        self.ui = UserInterface(self.get_screen_size())
         self.font = pygame.font.Font("data/fonts/retro-gaming.ttf", 12)
 
         self.heartElements = []
         self.healthTexts = []
         self.ammoTypeElements = []
         self.ammoTexts = []
+        self.playerInterfaces = []  # the elements made for each player slot, kept across games
 
-        self.waveNumberText = TextElement((10, self.get_world_size()[1] - 20), "1", self.font)
+        self.waveNumberText = TextElement((10, self.get_screen_size()[1] - 20), "1", self.font)
         self.scoreText = TextElement((20, 20), "0", self.font)
         self.fpsText = TextElement((200, 200), "0", self.font)
         
         self.ui.add(*self.heartElements, *self.healthTexts, *self.ammoTypeElements, self.waveNumberText, *self.ammoTexts, self.scoreText)
-        
+
+        # the death screen is built the first time the player dies
+        self.deathGroup = None
+        self.dead = False
+        self.window.ui = self.ui
+        self.startup.mark("interface")
+
+        # trades effects for frame time when frames run over the target
+        self.governor = QualityGovernor(self.settings.targetFPS, level=self.settings.qualityLevel)
+        self.governor.onChange = self.apply_quality
+        self.apply_quality(self.governor.current)
+
+        self.renderer = RenderPipeline(self.compose, self.flip, threaded=self.settings.pipelined)
+        self.inputTime = None  # when the input of the current tick was read
+        self.latency = LatencyTracker()
+        self.restartStart = None  # when retry was clicked, until the first frame of the new game is captured
+        self.restartTimes = deque(maxlen=100)  # seconds from clicking retry to presenting the new game
+        self.recorder = None
+        self.captureSource = None
+        if self.settings.captureSource:
+            self.start_capture(self.settings.captureSource)
+        self.startup.mark("game")
+
+    # builds the death screen
+    def create_death_screen(self):
         self.smallerFont = pygame.font.Font("data/fonts/retro-gaming.ttf", 10)
         self.deathBackground = RectElement((0, 0), (200, 200), (0, 0, 0, 150))
 
@@ -121,24 +208,35 @@ class Game():
         
         self.deathGroup.center_element_x(self.asteroidsStatsLabel)
         self.deathGroup.set_visible(False)
-        self.ui.add_group(self.deathGroup)
-        
-        self.dead = False
-        self.window.ui = self.ui
 
     # adds sprites to world
     def add_to_world(self, *sprites):
         self.window.world.add(*sprites)
 
-    # gets the scaled world size
-    def get_world_size(self):
+    # gets the scaled screen size
+    def get_screen_size(self):
         return self.window.world.screenSize
 
-    # detects input devices and appends them
+    # gets the size of the playfield, which is one screen unless a larger world is set
+    def get_world_size(self):
+        if self.settings.worldSize is not None:
+            return self.settings.worldSize
+        return self.get_screen_size()
+
+    # the areas whose nearby sectors stay awake, what the camera shows and every player
+    def get_focus(self):
+        return [self.window.world.view, *(player.rect for player in self.players)]
+
+    # detects input devices and appends them, controllers are only looked for once the joystick module is started
     def detect_inputs(self):
         self.inputDevices = []
         self.inputDevices.append(Keyboard(self.settings.keyboard))
+        if pygame.joystick.get_init():
+            self.detect_controllers()
+        logger.info("Detected %s input devices", len(self.inputDevices))
 
+    # appends a controller for every joystick
+    def detect_controllers(self):
         try:
             joysticks = controller_check()
             for joystick in joysticks: 
@@ -148,8 +246,6 @@ class Game():
         except:
             logger.info("No controllers detected")
 
-        logger.info("Detected %s input devices", len(self.inputDevices))
-
     # creates a player and assigns them input
     def create_player(self, pos, input=0, layer=0):
         numOfPlayers = len(self.players.sprites())
@@ -159,18 +255,39 @@ class Game():
         weapons = [self.DEFAULT_WEAPON.copy(), self.MISSILE_WEAPON.copy(), self.PIERCING_WEAPON.copy(), self.SPREADING_WEAPON.copy()]
 
         player.input = input
+        player.timers = self.timers
+        for weapon in weapons:
+            weapon.timers = self.timers
         player.weapons = weapons
         player.weapon = player.weapons[0]
 
         self.create_player_interface()
 
+        # the camera follows the first player around a world larger than the screen
+        if numOfPlayers == 0 and self.sectors.enabled:
+            self.window.world.set_target(player)
+
         self.players.add(player)
         self.add_to_world(player)
     
-    # creates the user interface for the player.
+    # creates the user interface for the player, reusing the elements the player in the same place had last game
     def create_player_interface(self):
         numPlayers = len(self.players)
-        size = self.get_world_size()
+        size = self.get_screen_size()
+        if numPlayers < len(self.playerInterfaces):
+            heart, healthText, ammoText, ammoType = self.playerInterfaces[numPlayers]
+        else:
+            heart, healthText, ammoText, ammoType = self.build_player_interface(numPlayers, size)
+            self.playerInterfaces.append((heart, healthText, ammoText, ammoType))
+
+        self.heartElements.append(heart)
+        self.healthTexts.append(healthText)
+        self.ammoTypeElements.append(ammoType)
+        self.ammoTexts.append(ammoText)
+
+        self.ui.add(heart, healthText, ammoText, ammoType)
+
+    def build_player_interface(self, numPlayers, size):
         match numPlayers:
             case 0:
                 heart = AnimatedElement((20, 20), (11, 11), "heart", self.assets)
@@ -184,13 +301,7 @@ class Game():
                 ammoText = TextElement((size[0] - 70, 40), f"{self.DEFAULT_WEAPON.magazine} / {self.DEFAULT_WEAPON.maxMagazine}", self.font)
                 ammoType = AnimatedElement((size[0] - 92, 40), (15, 15), "lasarbeam", self.assets)
                 ammoType.rotation = -90
-
-        self.heartElements.append(heart)
-        self.healthTexts.append(healthText)
-        self.ammoTypeElements.append(ammoType)
-        self.ammoTexts.append(ammoText)
-
-        self.ui.add(heart, healthText, ammoText, ammoType)
+        return heart, healthText, ammoText, ammoType
 
     # updates the user interface for each player
     def update_player_interface(self):
@@ -208,56 +319,74 @@ class Game():
     def calculate_deltatime(self):
         self.dt = self.clock.tick() / 1000
 
-    # draws the window
+    # captures the window as it is this tick and hands it to the renderer
     def draw(self):
         self.particles.draw(self.window.world)
-        self.window.world.draw_scrolling_background(self.background, self.bgScroll)
-        self.window.draw_world()
-        self.window.draw_foreground()
-        self.window.draw_ui()
-        self.window.draw()
+        self.window.world.draw_background(self.background)
+        snapshot = self.window.capture(self.inputTime, detached=self.renderer.threaded, inputs=self.latency.capture())
+        snapshot.restartStart, self.restartStart = self.restartStart, None
+        self.renderer.submit(snapshot)
+        self.update_quality()
+
+    # draws a snapshot into the display, on the render thread when pipelined
+    def compose(self, snapshot):
+        self.window.present(snapshot)
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.capture(self.window.display if self.captureSource == "display" else snapshot.world.target)
+
+    # shows the composed snapshot, always on the main thread since SDL only takes video calls from the thread that made the window
+    def flip(self, snapshot):
+        flipStart = time.perf_counter()
         pygame.display.flip()
+        self.latency.presented(snapshot.inputs, flipStart, time.perf_counter())
+        if snapshot.restartStart is not None:
+            self.restartTimes.append(time.perf_counter() - snapshot.restartStart)
+            logger.info("Restarted in %.2fms", self.restartTimes[-1] * 1000)
 
     # background scrolling
     def scroll_background(self):
-        self.bgScroll += self.dt * 75
-        if self.bgScroll >= self.background.height:
-            self.bgScroll = 0
+        self.background.update(self.dt)
 
     # game updates
     def update(self):
         self.window.update()
         self.scroll_background()
-
-        self.totalAsteroids.change_text(str(self.totalAsteroidsStats))
-        self.asteroidStats.change_text(str(self.asteroidsDestroyed))
-        self.missedAsteroids.change_text(str(self.asteroidsMissed))
-        self.scoreStats.change_text(str(self.score))
+        PARTICLE_QUALITY.reset()
+
+        self.movers.update(self.dt, self.get_world_size())
+        self.kinetics.advance(self.dt, self)
+        self.timers.advance(self.dt)
+        self.sectors.resize(self.get_world_size(), self.get_screen_size())
+        self.sectors.update(self.get_focus())
+        projectiles, ufos, asteroids, items = self.sectors.simulate(self.dt, self.projectiles, self.ufos, self.asteroids, self.items)
+        self.spatial.rebuild(self.players, projectiles, ufos, asteroids, items)
+        self.collisions.update(self.spatial)
+        # every animation moves forward with the clock, after contacts have set this tick's actions
+        ANIMATION_CLOCK.advance(self.dt)
 
         player: Player
         for player in self.players:
             player.update([], self.dt, self.window.world, self)
             if player.health <= 0: self.state = "dead"
 
-        for projectile in self.projectiles:
+        for projectile in self.registry.living(projectiles):
             projectile.update(self.dt, self, self.particles)
 
-        for ufo in self.ufos:
+        for ufo in self.registry.living(ufos):
             ufo.update(self.dt, self.window.world, self)
 
         for arrow in self.arrows:
             arrow.update(self.dt)
 
-        for asteroid in self.asteroids:
+        for asteroid in self.registry.living(asteroids):
             asteroid.update(self.dt, self)
 
-        for item in self.items:
+        for item in self.registry.living(items):
             item.update(self.dt)
-            item.check_collisions(self.players)
             item.transform.y += self.dt * 30
 
         self.update_player_interface()
-        self.deathGroup.dock(self.get_world_size(), True, False)
 
         self.scoreText.change_text(str(self.score))
         self.fpsText.change_text(str(self.clock.get_fps()))
@@ -274,110 +403,185 @@ class Game():
                 sprite.kill()
         self.ui.update(self.dt, self.window.world)
 
+        # events are delivered before the entities killed this tick leave every group at once
+        self.events.dispatch()
+        self.registry.flush()
+
     # handles the event
     def event_handler(self):
+        stamp = self.latency.read()
+        self.inputTime = stamp[0]
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.state = ""
-            if event.type == self.ASTEROID_SPAWN:
-                self.totalAsteroidsStats += 1
-            if event.type == self.ASTEROID_MISSED:
-                self.asteroidsMissed += 1
-            if event.type == self.ASTEROID_DESTROYED:
-                self.asteroidsDestroyed += 1
+            if event.type == pygame.KEYDOWN and event.key == K_F9:
+                self.toggle_capture()
 
-            for player in self.players:
-                player.event_handler(event, self)
+            for device in self.inputDevices:
+                device.handle_event(event, stamp)
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 print("MouseDown")
-                if event.button == 1 and self.state == "dead":
+                if event.button == 1 and self.state == "dead" and self.deathGroup is not None:
                     print("pressed")
                     if self.retryButtonText in self.ui.hoveredElements:
                         print("dead")
-                        self.start_game()
+                        self.restart_game()
+
+        # every input source turns this tick's events into one snapshot, which is all the players read
+        for source in {*self.inputDevices, *(player.input for player in self.players if player.input is not None)}:
+            source.poll()
+        for player in self.players:
+            if player.input is not None:
+                player.handle_input(player.input.actions, self)
+                self.latency.consume(player.input.actions)
 
-            self.waveSystem.event_handler(event)
+    def on_asteroid_spawned(self, event):
+        self.totalAsteroidsStats += 1
+
+    def on_asteroid_missed(self, event):
+        self.asteroidsMissed += 1
+
+    def on_asteroid_destroyed(self, event):
+        self.asteroidsDestroyed += 1
 
     def death_screen(self):
+        if self.deathGroup is None:
+            self.create_death_screen()
         if not self.dead:
             self.ui.add_group(self.deathGroup)
             self.dead = True
 
+        self.totalAsteroids.change_text(str(self.totalAsteroidsStats))
+        self.asteroidStats.change_text(str(self.asteroidsDestroyed))
+        self.missedAsteroids.change_text(str(self.asteroidsMissed))
+        self.scoreStats.change_text(str(self.score))
+        self.deathGroup.dock(self.get_screen_size(), True, False)
+
         pygame.mouse.set_visible(True)
         self.deathGroup.set_visible(True)
         self.retryButtonText.set_active(True)
 
+    # resets the gameplay state for a new game, the fonts, interface, assets and caches from the last one are kept
     def start_game(self):
-        self.players.empty()
-        self.projectiles.empty()
-        self.ufos.empty()
-        self.asteroids.empty()
-        self.arrows.empty()
-        self.explosions.empty()
-        self.other.empty()
-        self.items.empty()
-        self.ui.elements = []
-        self.window.world.empty()
-
-        self.waveSystem = WaveSystem(self)
+        self.registry.clear()
+        self.movers.clear()
+        self.kinetics.clear()
+        self.timers.clear()
+        self.collisions.clear()
+        self.events.clear()
+        self.governor.reset()
+
+        self.waveSystem.reset()
         self.score = 0
         self.state = "running"
 
-        self.deathGroup.set_visible(False)
-        self.deathGroup.set_active(False)
+        self.asteroidsDestroyed = 0
+        self.asteroidsMissed = 0
+        self.totalAsteroidsStats = 0
 
-        self.ASTEROID_SPAWN = USEREVENT + 4
-        self.ASTEROID_MISSED = USEREVENT + 5
-        self.ASTEROID_DESTROYED = USEREVENT + 6
+        self.reset_interface()
+        self.create_player((200, 20), 0, layer=2)
 
-        # user interface elements
+    # restarts from the death screen, timing it until the first frame of the new game is presented
+    def restart_game(self):
+        self.restartStart = time.perf_counter()
+        self.start_game()
 
+    # takes the interface back to how a new game starts
+    def reset_interface(self):
+        # the elements of every player are put back up as the players are created
+        for elements in zip(self.heartElements, self.healthTexts, self.ammoTexts, self.ammoTypeElements):
+            for element in elements:
+                if element in self.ui.elements:
+                    self.ui.remove(element)
         self.heartElements = []
         self.healthTexts = []
         self.ammoTypeElements = []
         self.ammoTexts = []
 
-        self.asteroidsDestroyed = 0
-        self.asteroidsMissed = 0
-        self.totalAsteroidsStats = 0
-
-        self.waveNumberText = TextElement((10, self.get_world_size()[1] - 20), "1", self.font)
-        self.scoreText = TextElement((20, 20), "0", self.font)
-        self.fpsText = TextElement((200, 200), "0", self.font)
-        
-        self.ui.add(*self.heartElements, *self.healthTexts, *self.ammoTypeElements, self.waveNumberText, *self.ammoTexts, self.scoreText)
-        
-        self.smallerFont = pygame.font.Font("data/fonts/retro-gaming.ttf", 10)
-        self.deathBackground = RectElement((0, 0), (200, 200), (0, 0, 0, 150))
+        self.waveNumberText.change_text("1")
+        self.scoreText.change_text("0")
 
-        self.totalAsteroids = TextElement((20, 30), "0", self.smallerFont)
-        self.totalAsteroidsLabel = TextElement((20, 10), "Total Asteroids", self.smallerFont)
-
-        self.asteroidStats = TextElement((20, 70), "0", self.smallerFont)
-        self.asteroidsStatsLabel = TextElement((20, 50), "Destroyed Asteroids", self.smallerFont)
-        
-        self.missedAsteroids = TextElement((20, 110), "0", self.smallerFont)
-        self.missedAsteroidsLabel = TextElement((20, 90), "Missed Asteroids", self.smallerFont)        
-
-        self.scoreLabel = TextElement((20, 130), "Score", self.smallerFont)
-        self.scoreStats = TextElement((20, 150), "0", self.smallerFont)
-        
-        self.retryButtonText = TextElement((80, 170), "Retry", self.smallerFont)  
-
-        self.deathGroup = Group((100, 100), (200, 200))
-        self.deathGroup.add(self.deathBackground, self.retryButtonText, self.asteroidsStatsLabel, self.missedAsteroids, self.missedAsteroidsLabel, self.asteroidStats, self.scoreLabel, self.scoreStats, self.totalAsteroids, self.totalAsteroidsLabel)
-        
-        self.deathGroup.center_element_x(self.asteroidsStatsLabel)
-        self.deathGroup.set_visible(False)
+        if self.deathGroup is not None:
+            for element in (self.deathGroup, *self.deathGroup.elements):
+                if element in self.ui.elements:
+                    self.ui.remove(element)
+            self.deathGroup.set_visible(False)
+            self.deathGroup.set_active(False)
         self.dead = False
-
-        self.create_player((200, 20), 0, layer=2)
+        self.ui.hoveredElements = []
+
+    # applies the settings of a quality level
+    def apply_quality(self, level):
+        PARTICLE_QUALITY.set(level.particleRate, level.particleCap, level.lighting)
+        # never more exact than the collision fidelity in the settings
+        if self.settings.collisionFidelity == "approximate":
+            self.collisions.fidelity = "approximate"
+        else:
+            self.collisions.fidelity = level.collisionFidelity
+        self.ui.refreshInterval = level.uiRefresh
+        self.window.set_render_scale(self.settings.renderScale or level.renderScale)
+        self.window.set_post_effects(level.postEffects if self.settings.postEffects is None else self.settings.postEffects)
+
+    # starts recording the world at its full internal resolution, or the whole display
+    def start_capture(self, source="world"):
+        if self.recorder is not None:
+            return
+        surface = self.window.display if source == "display" else self.window.worldScreen
+        size = surface.get_size() if source == "display" else self.window.world.screenSize
+        directory = os.path.join(self.settings.captureDirectory, time.strftime("%Y%m%d-%H%M%S"))
+        recorder = FrameRecorder(directory, size, self.settings.targetFPS, self.settings.captureFormat)
+        recorder.start(surface)
+        self.captureSource = source
+        self.recorder = recorder
+
+    def stop_capture(self):
+        recorder = self.recorder
+        self.recorder = None
+        if recorder is not None:
+            recorder.stop()
+
+    def toggle_capture(self):
+        if self.recorder is None:
+            # the world is a fraction of the display to copy and encode
+            self.start_capture(self.settings.captureSource or "world")
+        else:
+            self.stop_capture()
+
+    # replaces the job system with one of a different size
+    def set_job_workers(self, workers):
+        if self.jobs is not None:
+            self.jobs.shutdown()
+        self.jobs = JobSystem(workers)
+        self.movers.jobs = self.jobs
+        self.collisions.jobs = self.jobs
+
+    # feeds the frame time to the quality governor
+    def update_quality(self):
+        if self.settings.adaptiveQuality:
+            self.governor.tick()
+
+    # starts what the first frame did not need, once it is on the display
+    def finish_startup(self):
+        self.renderer.finish()
+        self.startup.mark("first frame")
+        self.started = True
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            logger.info("No audio device, the mixer is not started")
+        pygame.joystick.init()
+        self.detect_controllers()
+        self.startup.mark("mixer and controllers")
+        if self.profileStartup:
+            logger.info("%s", self.startup.report())
 
     # runs the game
     def run(self):
         self.detect_inputs()
         self.start_game()
+        self.startup.mark("first game")
         #self.create_player((300, 20), 0, layer=2)
         
         while True:
@@ -387,6 +591,8 @@ class Game():
                 self.event_handler()
                 self.update()
                 self.draw()
+                if not self.started:
+                    self.finish_startup()
                 #print(int(self.clock.get_fps()))
             if self.state == "dead":
                 self.update()
@@ -396,9 +602,18 @@ class Game():
                 self.event_handler()
             if self.state == "":
                 break
+        self.renderer.stop()
+        self.stop_capture()
+        self.jobs.shutdown()
+        logger.info(self.latency.summary())
+        logger.info(self.window.postProcessor.summary())
+        logger.info(self.window.compositor.summary())
             
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Runs the game.")
+    parser.add_argument("--profile-startup", action="store_true", help="log how long each step of starting up took, up to the first frame")
+    args = parser.parse_args()
+    game = Game(STARTUP, args.profile_startup)
     game.run()
     pygame.quit()
     sys.exit()
@@ -4,34 +4,89 @@ import json
 import os
 import logging
 
+# Scripts
+from scripts.constants import ANIMATION_DATA_PATH
+
 logger = logging.getLogger(__name__)
 
+class AnimationClock:
+    """
+    The simulation time animations are played against. The game advances it once per tick, so every playing animation moves forward without being updated one by one.
+    """
+    def __init__(self):
+        self.time = 0
+
+    def advance(self, dt):
+        self.time += dt
+
+CLOCK = AnimationClock()
+
 # Animation System
 class Animation:
+    """
+    An immutable table of frames shared by every entity playing it. Entities hold an AnimationCursor instead of their own copy.
+    """
     def __init__(self, images, img_dur=0.2, loop=True):
-        self.images = images
+        self.images = tuple(images)
         self.loop = loop
         self.img_duration = img_dur
-        self.done = False
-        self.frame = 0
-        self.time_elapsed = 0
-    
-    # Returns a copy of itself
-    def copy(self):
-        return Animation(self.images, self.img_duration, self.loop)
-    
-    # Updates the current frame (uses deltatime)
-    def update(self, dt):
-        self.time_elapsed += dt
-        while self.time_elapsed >= self.img_duration:
-            self.time_elapsed -= self.img_duration
-            if self.loop:
-                self.frame = (self.frame + 1) % len(self.images)
-            else:
-                self.frame = min(self.frame + 1, len(self.images) - 1)
-                if self.frame == len(self.images) - 1:
-                    self.done = True
-    
+        self.variants = None  # its flipped and rotated frames and their masks, when there is a sprite cache
+
+    # starts playing the animation from the current clock time
+    def play(self, speed=1, clock=CLOCK):
+        return AnimationCursor(self, clock, speed)
+
+    # gets the frame index an amount of time into the animation
+    def frame_at(self, elapsed):
+        frame = int(elapsed / self.img_duration + 1e-9)
+        if self.loop:
+            return frame % len(self.images)
+        return min(frame, len(self.images) - 1)
+
+    # whether a non looping animation is finished an amount of time into it, once it has reached its last frame and shown at least one
+    def done_at(self, elapsed):
+        if self.loop:
+            return False
+        return int(elapsed / self.img_duration + 1e-9) >= max(1, len(self.images) - 1)
+
+class AnimationCursor:
+    """
+    Where an entity is in a shared animation, computed from the clock whenever a frame is asked for.
+    """
+    __slots__ = ("animation", "clock", "start", "speed")
+
+    def __init__(self, animation, clock=CLOCK, speed=1):
+        self.animation = animation
+        self.clock = clock
+        self.start = clock.time
+        self.speed = speed
+
+    @property
+    def images(self):
+        return self.animation.images
+
+    @property
+    def loop(self):
+        return self.animation.loop
+
+    @property
+    def img_duration(self):
+        return self.animation.img_duration
+
+    # the current frame index
+    @property
+    def frame(self):
+        return self.animation.frame_at((self.clock.time - self.start) * self.speed)
+
+    # whether a non looping animation has reached its last frame, a single frame still shows for its duration
+    @property
+    def done(self):
+        return self.animation.done_at((self.clock.time - self.start) * self.speed)
+
+    # starts the animation over
+    def restart(self):
+        self.start = self.clock.time
+
     # Returns the current frame
     def img(self):
         return self.images[self.frame]
@@ -52,7 +107,7 @@ def load_images(path):
                 images.append(img)
     return images
 
-def load_animations(base_path, data="data/animation_data.json"):
+def load_animations(base_path, data=ANIMATION_DATA_PATH):
     assets = {}
     with open(data, "rb") as file:
         data = json.load(file)
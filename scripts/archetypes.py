@@ -0,0 +1,81 @@
+# Modules
+import json
+import logging
+
+# Scripts
+from scripts.collisions import Collider
+
+logger = logging.getLogger(__name__)
+
+class Archetype:
+    """
+    The constants shared by every entity of one kind, compiled once from the archetype data file. Records are read only, entities point at their archetype and only hold their own mutable state.
+    """
+    __slots__ = ("name", "tag", "size", "layer", "speed", "damage", "health", "lifetime", "rotation", "rotationSpeed", "spawnTime", "explosionTimer", "particleOffset", "boundsMargins", "collider")
+
+    def __init__(self, name, data):
+        size = tuple(data["size"])
+        collider = data.get("collider", {})
+        shape = collider.get("shape", "aabb")
+        values = {
+            "name": name,
+            "tag": data.get("tag", name),
+            "size": size,
+            "layer": data.get("layer", 0),
+            "speed": data.get("speed", 100),
+            "damage": data.get("damage", 0),
+            "health": data.get("health", 0),
+            "lifetime": data.get("lifetime"),
+            "rotation": data.get("rotation", 0),
+            "rotationSpeed": data.get("rotationSpeed", 0),
+            "spawnTime": data.get("spawnTime", 0),
+            "explosionTimer": data.get("explosionTimer", 0),
+            "particleOffset": tuple(data.get("particleOffset", (0, 0))),
+            "boundsMargins": tuple(data.get("boundsMargins", (25, 25, 25, 25))),
+            # circles default to fitting inside the entity
+            "collider": Collider(shape, collider.get("radius", min(size) / 2 if shape == "circle" else 0), collider.get("swept", False)),
+        }
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"archetype {self.name} is read only")
+
+    def __repr__(self):
+        return f"Archetype({self.name})"
+
+class ArchetypeField:
+    """
+    An entity attribute read from the entity's archetype. Entities without an archetype store their own value instead.
+    """
+    def __init__(self, field=None):
+        self.field = field
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        if self.field is None:
+            self.field = name
+
+    def __get__(self, entity, owner=None):
+        if entity is None:
+            return self
+        if entity.archetype is not None:
+            return getattr(entity.archetype, self.field)
+        try:
+            return entity.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, entity, value):
+        if entity.archetype is not None:
+            raise AttributeError(f"{self.name} is set by the {entity.archetype.name} archetype")
+        entity.__dict__[self.name] = value
+
+# Loads every archetype in the data file
+def load_archetypes(data="data/archetypes.json"):
+    with open(data, "rb") as file:
+        data = json.load(file)
+
+    archetypes = {name: Archetype(name, values) for name, values in data.items()}
+    logger.info("Loaded %s archetypes", len(archetypes))
+    return archetypes
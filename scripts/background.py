@@ -0,0 +1,96 @@
+# Modules
+import math
+import random
+import logging
+import pygame
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+class BackgroundLayer:
+    """
+    An image that repeats in both directions behind the world. It is converted to the display format once and cut into tiles, and each frame only the tiles that overlap the view are drawn. Tiles with nothing in them are dropped when the layer is made.
+
+    The layer follows the camera at a share of its scroll, lower for layers further away, and drifts on its own at a fixed velocity.
+    """
+    def __init__(self, image, scrollRate=1, velocity=(0, 0), tileSize=128, opaque=False, camLayer=-10):
+        # opaque images blit faster without the alpha channel
+        self.image = image.convert() if opaque else image.convert_alpha()
+        self.opaque = opaque  # an opaque layer covers the whole view
+        self.size = self.image.get_size()
+        self.scrollRate = scrollRate  # share of the camera scroll the layer moves by
+        self.velocity = pygame.math.Vector2(velocity)  # pixels per second
+        self.offset = pygame.math.Vector2()
+        self.camLayer = camLayer
+        self.tiles = []  # (x, y, surface) inside the image
+        for y in range(0, self.size[1], tileSize):
+            for x in range(0, self.size[0], tileSize):
+                rect = pygame.Rect(x, y, tileSize, tileSize).clip(self.image.get_rect())
+                tile = self.image.subsurface(rect)
+                if opaque or tile.get_bounding_rect().width:
+                    self.tiles.append((x, y, tile))
+
+    @property
+    def width(self):
+        return self.size[0]
+
+    @property
+    def height(self):
+        return self.size[1]
+
+    def update(self, dt):
+        self.offset += self.velocity * dt
+        self.offset.x %= self.size[0]
+        self.offset.y %= self.size[1]
+
+    # draw commands for the tiles that overlap a view of a size at a camera scroll
+    def commands(self, scroll, viewSize):
+        width, height = self.size
+        # where the copy of the image nearest the top left of the view starts
+        originX = (self.offset.x - scroll[0] * self.scrollRate) % width - width
+        originY = (self.offset.y - scroll[1] * self.scrollRate) % height - height
+        columns = math.ceil((viewSize[0] - originX) / width)
+        rows = math.ceil((viewSize[1] - originY) / height)
+        commands = []
+        for row in range(rows):
+            for column in range(columns):
+                left, top = originX + column * width, originY + row * height
+                for x, y, tile in self.tiles:
+                    tileX, tileY = left + x, top + y
+                    if tileX < viewSize[0] and tileY < viewSize[1] and tileX + tile.get_width() > 0 and tileY + tile.get_height() > 0:
+                        commands.append(("image", tile, (round(tileX), round(tileY))))
+        return commands
+
+class Starfield(BackgroundLayer):
+    """
+    A layer of stars scattered at random over a tile of the given size. The same seed always scatters the same stars.
+    """
+    def __init__(self, size=(256, 256), count=60, colours=((255, 255, 255), (170, 200, 255), (255, 230, 170)), seed=0, **kwargs):
+        generator = random.Random(seed)
+        image = pygame.Surface(size, pygame.SRCALPHA)
+        for _ in range(count):
+            position = generator.randrange(size[0]), generator.randrange(size[1])
+            colour = (*generator.choice(colours), generator.randint(90, 255))
+            image.set_at(position, colour)
+            # a few are bright enough to show a cross
+            if generator.random() < 0.1:
+                faint = (*colour[:3], colour[3] // 3)
+                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                    image.set_at(((position[0] + dx) % size[0], (position[1] + dy) % size[1]), faint)
+        super().__init__(image, **kwargs)
+
+class ParallaxBackground:
+    """
+    The layers drawn behind the world, from the furthest away to the nearest.
+    """
+    def __init__(self, *layers):
+        self.layers = list(layers)
+
+    def add(self, layer):
+        self.layers.append(layer)
+
+    def update(self, dt):
+        for layer in self.layers:
+            layer.update(dt)
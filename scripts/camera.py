@@ -1,27 +1,166 @@
 # Modules
+import time
 import pygame
 import random
+import weakref
 from pygame.constants import *
 import logging
 
 # Scripts
-
+from scripts.registry import ModifiedSpriteGroup
+from scripts.postprocess import PostProcessor
 
 logger = logging.getLogger(__name__)
-    
+
+# scales a position on the view to a position on a render target
+def scale_point(point, renderScale):
+    return point[0] * renderScale, point[1] * renderScale
+
+# joins rects that overlap, so no part of an overlay is blended onto the display twice
+def merge_rects(rects):
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        # a union can grow into rects that were already kept, so it is checked again until it is not
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+class CameraFrame:
+    """
+    The draw commands a camera captured for one frame, in the coordinates of the render target they are drawn to.
+    """
+    __slots__ = ("target", "renderScale", "commands", "scrollDiff")
+
+    def __init__(self, target, renderScale, commands, scrollDiff):
+        self.target = target
+        self.renderScale = renderScale
+        self.commands = commands
+        self.scrollDiff = scrollDiff
+
+class RenderSnapshot:
+    """
+    Everything the window needs to present one tick. Nothing in it is changed by the simulation once it is captured, so it can be presented on another thread while the next tick runs.
+    """
+    __slots__ = ("world", "foreground", "ui", "shake", "inputTime", "inputs", "shakeAmount", "flash", "uiRects", "uiRedrawn", "restartStart")
+
+    def __init__(self, world, foreground, ui, shake, inputTime, inputs=(), shakeAmount=0, flash=0, uiRects=None, uiRedrawn=True):
+        self.world = world
+        self.foreground = foreground
+        self.ui = ui
+        self.uiRects = uiRects  # the parts of the interface that have something in them, None for all of it
+        self.uiRedrawn = uiRedrawn  # whether the interface changed since the snapshot before
+        self.restartStart = None  # when the restart this frame is the first to show was asked for
+        self.shake = shake
+        self.shakeAmount = shakeAmount  # how hard the screen was shaking, for the post effects
+        self.flash = flash
+        self.inputTime = inputTime  # when the input this tick simulated was read
+        self.inputs = inputs  # latency samples of the inputs this frame is the first to show
+
+class Compositor:
+    """
+    Puts the layers of a frame together on the display. The world is opaque, so it is stretched into an opaque base and copied to the display without blending. Only the overlays, the foreground and the interface, are alpha blended, and only over the parts of them that something was drawn to. The interface is only stretched to the display when it was redrawn.
+
+    The time spent on each layer is added up so the cost of compositing can be compared.
+    """
+    def __init__(self, display, margin=10):
+        self.display = display
+        self.resolution = display.get_size()
+        self.margin = margin  # how far the base reaches past every edge of the display
+        # the world is upscaled past the edges of the display so screen shake rarely shows the border
+        self.base = pygame.Surface((self.resolution[0] + margin * 2, self.resolution[1] + margin * 2), pygame.HWSURFACE).convert()
+        self.uiPieces = []  # (the part of the interface stretched to the display, where it goes)
+        self.uiSource = None
+        # cost
+        self.timings = {}  # layer -> seconds spent compositing it since the last reset
+        self.frames = 0
+
+    def time_layer(self, layer, start):
+        now = time.perf_counter()
+        self.timings[layer] = self.timings.get(layer, 0) + now - start
+        return now
+
+    # stretches the opaque world over the display, offset by the screen shake and the part of the scroll that was rounded off
+    def compose_base(self, world, offset):
+        pygame.transform.scale(world, self.base.get_size(), self.base)
+        position = (offset[0] - self.margin, offset[1] - self.margin)
+        # the border only needs clearing when the base does not cover the whole display
+        if not -self.margin * 2 <= position[0] <= 0 or not -self.margin * 2 <= position[1] <= 0:
+            self.display.fill((0, 0, 0))
+        self.display.blit(self.base, position)
+
+    # blends the parts of an overlay of the display size that something was drawn to
+    def compose_overlay(self, overlay, rects):
+        self.display.blits([(overlay, rect, rect) for rect in merge_rects(rects)], doreturn=False)
+
+    # stretches the parts of the interface that have something in them when it changed, and blends them
+    def compose_ui(self, ui, rects, redrawn):
+        if redrawn or ui is not self.uiSource:
+            self.uiSource = ui
+            bounds = ui.get_rect()
+            scaleX, scaleY = self.resolution[0] / bounds.width, self.resolution[1] / bounds.height
+            self.uiPieces = []
+            for rect in merge_rects([bounds] if rects is None else rects):
+                rect = rect.clip(bounds)
+                if not rect.width or not rect.height:
+                    continue
+                left, top = int(rect.left * scaleX), int(rect.top * scaleY)
+                size = int(rect.right * scaleX) - left, int(rect.bottom * scaleY) - top
+                self.uiPieces.append((pygame.transform.scale(ui.subsurface(rect), size), (left, top)))
+        self.display.blits(self.uiPieces, doreturn=False)
+
+    def compose(self, world, offset, foreground, foregroundRects, ui=None, uiRects=None, uiRedrawn=True):
+        start = time.perf_counter()
+        self.compose_base(world, offset)
+        start = self.time_layer("base", start)
+        if foregroundRects:
+            self.compose_overlay(foreground, foregroundRects)
+        start = self.time_layer("foreground", start)
+        if ui is not None:
+            self.compose_ui(ui, uiRects, uiRedrawn)
+            self.time_layer("ui", start)
+        self.frames += 1
+
+    # average milliseconds per frame spent on each layer
+    def costs(self):
+        frames = max(1, self.frames)
+        return {layer: seconds / frames * 1000 for layer, seconds in self.timings.items()}
+
+    def summary(self):
+        costs = self.costs()
+        if not costs:
+            return "nothing composited"
+        return f"compositing over {self.frames} frames, ms per frame: " + ", ".join(f"{layer} {cost:.2f}" for layer, cost in costs.items())
+
+    def reset_timings(self):
+        self.timings = {}
+        self.frames = 0
+
 class Window():
     """
     A class that manages the drawing of the window. This allows for pixel art to be easily upscaled. This class has 2 cameras. A world camera and a foreground camera. The world camera should be for entities in the world which are affected by scale. The foreground camera should be for elements like the cursor.
+
+    The world camera can render at a share of its full internal resolution, the upscale to the display stretches whatever it rendered to the same size. Post effects are applied to what it rendered before the upscale, so they cost the same at every display resolution. The world is rendered opaque, and the compositor only blends the foreground and interface over it.
     """
-    def __init__(self, resolution, flags=pygame.FULLSCREEN):
+    def __init__(self, resolution, flags=pygame.FULLSCREEN, registry=None, renderScales=(1, 0.75, 0.5)):
         self.resolution = resolution
         self.display = pygame.display.set_mode(resolution, flags=flags)
 
-        self.world = Camera(self.resolution, 3, (0, 0), minScale=1, maxScale=1, panStrength=10)
+        worldGroup = registry.group("world") if registry is not None else None
+        self.world = Camera(self.resolution, 3, (0, 0), minScale=1, maxScale=1, panStrength=10, group=worldGroup, renderScales=renderScales, opaque=True)
         self.foreground = Camera(self.resolution, 1)
         self.ui = None
+        self.uiCopy = None  # the interface as it was last drawn, for snapshots that outlive the tick
+        self.compositor = Compositor(self.display)
+
+        self.postProcessor = PostProcessor()
 
         self.screenShake = 0
+        self.flash = 0  # how strongly the world is tinted by a damage flash, from 0 to 1
+        self.flashDecay = 0.05
     
     @property
     def worldScreen(self):
@@ -33,37 +172,81 @@ class Window():
 
     def shake_screen(self, amount):
         self.screenShake = max(amount, self.screenShake)
+
+    def flash_screen(self, amount):
+        self.flash = max(amount, self.flash)
+
+    # picks the post effects applied to the world
+    def set_post_effects(self, effects):
+        self.postProcessor.set_effects(effects)
+
+    # changes the share of the full resolution the world is rendered at
+    def set_render_scale(self, renderScale):
+        self.world.set_render_scale(renderScale)
     
     def update(self):
         self.world.update()
         self.foreground.update()
 
         self.screenShake = max(0, self.screenShake - 1)
-
-    def draw_world(self, *args, **kwargs):
-        self.world.draw(*args, **kwargs)
-
-    def draw_foreground(self, *args, **kwargs):
-        self.foreground.draw(*args, **kwargs)
-
-    def draw_ui(self):
-        self.ui.draw()
-
-    def draw(self):
-        screenShakeOffset = pygame.math.Vector2(random.random() * self.screenShake - self.screenShake / 2, random.random() * self.screenShake - self.screenShake / 2)
-        self.display.fill((0, 0, 0))
-        self.display.blit(pygame.transform.scale(self.worldScreen, (self.resolution[0] + 20, self.resolution[1] + 20)), (screenShakeOffset.x - 10 - self.world.scrollDiff.x, screenShakeOffset.y - 10 - self.world.scrollDiff.y))
-        self.display.blit(self.foregroundScreen, (0, 0))
+        self.flash = max(0, self.flash - self.flashDecay)
+
+    # records everything needed to draw this tick. Detached snapshots hold nothing the simulation draws into again
+    def capture(self, inputTime=None, detached=False, inputs=()):
+        shake = (random.random() * self.screenShake - self.screenShake / 2, random.random() * self.screenShake - self.screenShake / 2)
+        world = self.world.capture()
+        foreground = self.foreground.capture()
+        ui = None
+        uiRects = None
+        redrawn = True
         if self.ui:
-            self.display.blit(pygame.transform.scale(self.ui.surface, self.resolution), (0, 0))
+            redrawn = self.ui.draw()
+            uiRects = self.ui.drawnRects
+            if not detached:
+                ui = self.ui.surface
+            else:
+                # the surface is only copied when the interface was redrawn
+                if redrawn or self.uiCopy is None:
+                    self.uiCopy = self.ui.surface.copy()
+                    redrawn = True
+                ui = self.uiCopy
+        return RenderSnapshot(world, foreground, ui, shake, inputTime, inputs, self.screenShake, self.flash, uiRects, redrawn)
+
+    # draws a snapshot to the display
+    def present(self, snapshot):
+        world = self.world.render(snapshot.world)
+        self.postProcessor.apply(world, snapshot.world.renderScale, snapshot.shakeAmount, snapshot.flash)
+        foreground = self.foreground.render(snapshot.foreground)
+        scrollDiff = snapshot.world.scrollDiff
+        offset = (snapshot.shake[0] - scrollDiff.x, snapshot.shake[1] - scrollDiff.y)
+        self.compositor.compose(world, offset, foreground, self.foreground.drawnRects, snapshot.ui, snapshot.uiRects, snapshot.uiRedrawn)
+
+    # draws the current state straight away
+    def draw(self):
+        self.present(self.capture())
+
+class Camera():
+    """
+    Draws its sprites and queued shapes to a surface of the resolution divided by the scale. Gameplay always works in that size, but the camera can render it to a smaller target, one preallocated per supported render scale, and every position, size and image is scaled down to match.
 
-class Camera(pygame.sprite.Group):
-    def __init__(self, resolution, scale, offset=(0, 0), panStrength=20, minScale=1, maxScale=1, zoomSpeed=1):
-        super().__init__(self)
+    The areas drawn to are remembered, so a target is only cleared where the frame before drew, and the window only blends those parts of it. Opaque cameras render to targets without an alpha channel in the display format.
+    """
+    def __init__(self, resolution, scale, offset=(0, 0), panStrength=20, minScale=1, maxScale=1, zoomSpeed=1, group=None, renderScales=(1,), opaque=False):
+        self.group = group if group is not None else ModifiedSpriteGroup()
         self.resolution = resolution
         self.scale = scale
         self.offset = offset
-        self.screen = pygame.Surface((self.resolution[0] / self.scale, self.resolution[1] / self.scale), pygame.SRCALPHA | pygame.HWSURFACE)
+        # render targets
+        self.renderScales = tuple(sorted(renderScales, reverse=True))
+        self.renderScale = self.renderScales[0]
+        self.renderTargets = {}  # render scale -> surface
+        self.scaledSurfaces = weakref.WeakKeyDictionary()  # surface -> (render scale, scaled surface)
+        self.dirtyRects = weakref.WeakKeyDictionary()  # render target -> the areas its last render drew to
+        self.drawnRects = []  # the areas the last render drew to
+        self.opaque = opaque
+        self.viewSize = (0, 0)
+        self.screen = None
+        self.allocate_targets()
         # scroll
         self.trueScroll = pygame.math.Vector2()
         self.oldScroll = pygame.math.Vector2()
@@ -81,6 +264,7 @@ class Camera(pygame.sprite.Group):
         self.renderOrder = {"x": False, "y": False, "layer": True}
         self.targets = ()
         self.queue = []
+        self.bounds = None  # the size of the world the scroll is kept inside, None to scroll freely
 
     @property
     def scroll(self):
@@ -88,17 +272,59 @@ class Camera(pygame.sprite.Group):
         self.scrollDiff = scroll - self.trueScroll
         return scroll
     
-    # the rescaled screen size
+    # the sprites drawn by the camera
+    def add(self, *sprites):
+        self.group.add(*sprites)
+
+    def remove(self, *sprites):
+        self.group.remove(*sprites)
+
+    def empty(self):
+        self.group.empty()
+
+    def sprites(self):
+        return self.group.sprites()
+
+    # the area the camera shows, in world coordinates
+    @property
+    def view(self):
+        return pygame.Rect(self.scroll, self.screenSize)
+
+    # the rescaled screen size, the same at every render scale
     @property
     def screenSize(self):
-        return self.screen.get_size()[0], self.screen.get_size()[1]
-    
-    # checks whether the sprites on screen should be affected by camera scroll
-    def calculate_scroll(self, sprite):
-        if sprite.isScroll:
-            self.screen.blit(sprite.image, (sprite.transform.x - self.scroll.x, sprite.transform.y - self.scroll.y))
-        else:
-            self.screen.blit(sprite.image, (sprite.transform.x, sprite.transform.y))
+        return self.viewSize
+
+    # creates a render target for every render scale at the current view size
+    def allocate_targets(self):
+        self.viewSize = int(self.resolution[0] / self.scale), int(self.resolution[1] / self.scale)
+        self.renderTargets = {}
+        for renderScale in self.renderScales:
+            size = max(1, round(self.viewSize[0] * renderScale)), max(1, round(self.viewSize[1] * renderScale))
+            if self.opaque:
+                self.renderTargets[renderScale] = pygame.Surface(size, pygame.HWSURFACE).convert()
+            else:
+                self.renderTargets[renderScale] = pygame.Surface(size, pygame.SRCALPHA | pygame.HWSURFACE)
+        self.screen = self.renderTargets[self.renderScale]
+        logger.debug("Allocated render targets for a %sx%s view", *self.viewSize)
+
+    # switches to the supported render scale closest to the one asked for
+    def set_render_scale(self, renderScale):
+        renderScale = min(self.renderScales, key=lambda supported: abs(supported - renderScale))
+        if renderScale != self.renderScale:
+            self.renderScale = renderScale
+            self.screen = self.renderTargets[renderScale]
+            logger.info("World rendering at %s of full resolution", renderScale)
+
+    # a surface resized to a render scale, kept while the surface lives so reused surfaces are only resized once
+    def scale_surface(self, surface, renderScale):
+        if renderScale == 1:
+            return surface
+        cached = self.scaledSurfaces.get(surface)
+        if cached is None or cached[0] != renderScale:
+            cached = (renderScale, pygame.transform.scale_by(surface, renderScale))
+            self.scaledSurfaces[surface] = cached
+        return cached[1]
 
     # adds a line to the queue
     def draw_line(self, colour, start, end, width=1, layer=1):
@@ -116,23 +342,10 @@ class Camera(pygame.sprite.Group):
     def draw_surface(self, surf, transform, flags, layer=1):
         self.queue.append(("surface", surf, transform, flags, layer))
 
-    # adds a scrolling background to the queue
-    def draw_scrolling_background(self, bg, bgScroll):
-        self.queue.append(("background", bg, bgScroll, bg.camLayer))
-
-    # draws a scrolling background
-    def scrolling_background(self, bg, bgScroll):
-        self.screen.blit(bg.image, (bg.transform.x - self.scroll.x, bgScroll - self.scroll.y))
-        self.screen.blit(bg.image, (bg.transform.x - self.scroll.x, -bg.height + bgScroll - self.scroll.y))
-        
-    # draws the keyword arguments
-    def draw_background(self, **kwargs):
-        if "fill" in kwargs:
-            self.screen.fill(kwargs["fill"])
-        if "image" in kwargs:
-            self.screen.blit(kwargs["image"], (0, 0))
-        else:
-            self.screen.fill((0, 0, 0, 0))  # fill with transparency by default
+    # adds every layer of a background to the queue
+    def draw_background(self, background):
+        for layer in background.layers:
+            self.queue.append(("background", layer, layer.camLayer))
 
     # sorts the sprites based on camera layer or last element of tuple
     def sort_sprites(self, sprite):
@@ -141,35 +354,87 @@ class Camera(pygame.sprite.Group):
         else:
             return sprite.camLayer
 
-    # draws all the elements in the queue sorted by its layer
-    def draw_queue(self):
-        sorted_queue = sorted(self.queue, key=lambda item: self.sort_sprites(item))
-        
-        for item in sorted_queue:
+    # resolves the queue and the sprites in view into draw commands without drawing anything
+    def capture(self, **kwargs):
+        commands = []
+        if "fill" in kwargs:
+            commands.append(("fill", kwargs["fill"]))
+        if "image" in kwargs:
+            commands.append(("image", kwargs["image"], (0, 0)))
+        elif not any(isinstance(item, tuple) and item[0] == "background" and item[1].opaque for item in self.queue):
+            commands.append(("clear",))  # clear to transparency by default, unless an opaque background covers everything
+
+        # sprites well outside the view are not drawn
+        view = self.view.inflate(64, 64)
+        for sprite in self.sprites():
+            if not sprite.isScroll or view.colliderect(sprite.rect):
+                self.queue.append(sprite)
+
+        scroll = self.scroll
+        for item in sorted(self.queue, key=self.sort_sprites):
             if isinstance(item, tuple):
                 match item[0]:
                     case "background":
-                        self.scrolling_background(item[1], item[2])
+                        commands.extend(item[1].commands(scroll, self.screenSize))
                     case "line":
-                        pygame.draw.line(self.screen, item[1], item[2] - self.scroll, item[3] - self.scroll, item[4])
-                        pygame.draw.circle(self.screen, (255, 0, 0), item[2] - self.scroll, 3)
-                        pygame.draw.circle(self.screen, (0, 255, 0), item[3] - self.scroll, 3)
+                        commands.append(("line", item[1], item[2] - scroll, item[3] - scroll, item[4]))
                     case "surface":
-                        self.screen.blit(item[1], item[2] - self.scroll, special_flags=item[3])
+                        commands.append(("blit", item[1], item[2] - scroll, item[3]))
                     case "rect":
-                        rect = item[2].copy()  # Assuming rect has a copy method or use `pygame.Rect` methods if it's a Rect
-                        rect.x -= self.scroll.x
-                        rect.y -= self.scroll.y
-                        pygame.draw.rect(self.screen, item[1], rect)
+                        commands.append(("rect", item[1], pygame.Rect(item[2]).move(-scroll.x, -scroll.y)))
                     case "circle":
-                        pygame.draw.circle(self.screen, item[1], item[2] - self.scroll, item[3], item[4])
-            else:
-                if item.hide != True:
-                    self.calculate_scroll(item)
-
-        # Clear the queue after processing
+                        commands.append(("circle", item[1], item[2] - scroll, item[3], item[4]))
+            elif item.hide != True:
+                # checks whether the sprite should be affected by camera scroll
+                if item.isScroll:
+                    commands.append(("blit", item.image, (item.transform.x - scroll.x, item.transform.y - scroll.y), 0))
+                else:
+                    commands.append(("blit", item.image, (item.transform.x, item.transform.y), 0))
         self.queue.clear()
-
+        return CameraFrame(self.screen, self.renderScale, commands, pygame.math.Vector2(self.scrollDiff))
+
+    # draws captured commands onto the render target they were captured for
+    def render(self, frame):
+        screen = frame.target
+        renderScale = frame.renderScale
+        drawn = []
+        for command in frame.commands:
+            match command[0]:
+                case "clear":
+                    self.clear(screen)
+                case "fill":
+                    drawn.append(screen.fill(command[1]))
+                case "image":
+                    drawn.append(screen.blit(self.scale_surface(command[1], renderScale), scale_point(command[2], renderScale)))
+                case "blit":
+                    surface = command[1] if renderScale == 1 else pygame.transform.scale_by(command[1], renderScale)
+                    drawn.append(screen.blit(surface, scale_point(command[2], renderScale), special_flags=command[3]))
+                case "line":
+                    start, end = scale_point(command[2], renderScale), scale_point(command[3], renderScale)
+                    rect = pygame.draw.line(screen, command[1], start, end, max(1, round(command[4] * renderScale)))
+                    rect = rect.union(pygame.draw.circle(screen, (255, 0, 0), start, 3 * renderScale))
+                    drawn.append(rect.union(pygame.draw.circle(screen, (0, 255, 0), end, 3 * renderScale)))
+                case "rect":
+                    rect = command[2]
+                    if renderScale != 1:
+                        rect = pygame.Rect(scale_point(rect.topleft, renderScale), scale_point(rect.size, renderScale))
+                    drawn.append(pygame.draw.rect(screen, command[1], rect))
+                case "circle":
+                    width = command[4] and max(1, round(command[4] * renderScale))
+                    drawn.append(pygame.draw.circle(screen, command[1], scale_point(command[2], renderScale), command[3] * renderScale, width))
+        drawn = [rect for rect in drawn if rect.width and rect.height]
+        self.dirtyRects[screen] = drawn
+        self.drawnRects = drawn
+        return screen
+
+    # clears a render target where its last render drew, or all of it when that is not known or is most of it
+    def clear(self, screen, maxRects=32):
+        rects = self.dirtyRects.get(screen)
+        if rects is None or len(rects) > maxRects:
+            screen.fill((0, 0, 0, 0))
+        else:
+            for rect in rects:
+                screen.fill((0, 0, 0, 0), rect)
 
     # sets a target sprite
     def set_target(self, target, offset=(0, 0)):
@@ -244,17 +509,18 @@ class Camera(pygame.sprite.Group):
         self.desiredScale = max(self.minScale, min(self.maxScale, self.desiredScale))
         # smoothly transition the current scale towards the desired scale
         self.scale += (self.desiredScale - self.scale) * self.zoomSpeed
-        tempScreen = pygame.transform.scale(self.screen.copy(), (self.resolution[0] / self.scale, self.resolution[1] / self.scale))
-        self.screen = tempScreen
+        # the targets are only replaced when the view actually changes size
+        if (int(self.resolution[0] / self.scale), int(self.resolution[1] / self.scale)) != self.viewSize:
+            self.allocate_targets()
+
+    # keeps the scroll inside the world bounds
+    def clamp_scroll(self):
+        self.trueScroll.x = max(0, min(self.trueScroll.x, self.bounds[0] - self.screenSize[0]))
+        self.trueScroll.y = max(0, min(self.trueScroll.y, self.bounds[1] - self.screenSize[1]))
 
     # handles all the drawing within the camera class
     def draw(self, **kwargs):
-        self.draw_background(**kwargs)
-
-        for sprite in self.sprites():
-            self.queue.append(sprite)
-
-        self.draw_queue()
+        return self.render(self.capture(**kwargs))
 
     # handles all the updates within the camera class
     def update(self):
@@ -262,3 +528,5 @@ class Camera(pygame.sprite.Group):
             self.follow_multiple_targets()
         elif self.target is not None:
             self.follow_target()
+        if self.bounds is not None:
+            self.clamp_scroll()
@@ -0,0 +1,136 @@
+# Modules
+import os
+import time
+import queue
+import shutil
+import logging
+import threading
+import subprocess
+import pygame
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+class FrameRecorder:
+    """
+    Records presented frames without stalling the game. Each frame is only copied into one of a fixed pool of buffers, encoding and writing happen on background threads that hand the buffers back once they are done. When every buffer is still busy the frame is dropped and counted instead of waiting, and its number is skipped so the gaps show in the output.
+
+    Frames are written as a numbered PNG sequence, or as a raw RGB stream fed to a local encoder process. A raw stream has to stay in order, so it is written by a single thread. Encoding PNGs competes with the game for the CPU, so by default they are written by one thread that runs at a lower priority where the system allows it, and frames are dropped rather than the game slowed when it falls behind.
+    """
+    def __init__(self, directory, size, fps=60, format="png", poolSize=8, workers=1, encoder="ffmpeg", writerNice=10):
+        self.directory = directory
+        self.size = size
+        self.fps = fps
+        self.format = format  # "png" or "raw"
+        self.poolSize = poolSize
+        self.workers = workers if format == "png" else 1
+        self.encoder = encoder
+        self.writerNice = writerNice  # how much lower the writers run than the game, 0 leaves them as they are
+        self.free = queue.Queue()  # buffers ready to be copied into
+        self.pending = queue.Queue()  # (frame number, buffer) waiting to be written
+        self.threads = []
+        self.stream = None
+        self.process = None
+        self.lock = threading.Lock()
+        # accounting
+        self.frame = 0
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.captureTime = 0
+        self.maxCaptureTime = 0
+
+    # creates the buffers in the format of the surface that will be captured and starts the writers
+    def start(self, surface):
+        os.makedirs(self.directory, exist_ok=True)
+        for _ in range(self.poolSize):
+            self.free.put(pygame.Surface(self.size, surface.get_flags() & pygame.SRCALPHA, surface))
+        if self.format == "raw":
+            self.open_stream()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self.write_frames, name=f"capture-{number}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info("Recording %sx%s frames to %s", self.size[0], self.size[1], self.directory)
+
+    # feeds the raw stream to the encoder, or to a file when there is no encoder to run
+    def open_stream(self):
+        if self.encoder and shutil.which(self.encoder):
+            command = [self.encoder, "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{self.size[0]}x{self.size[1]}", "-r", str(self.fps), "-i", "-", os.path.join(self.directory, "capture.mp4")]
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+            self.stream = self.process.stdin
+        else:
+            path = os.path.join(self.directory, "capture.rgb")
+            logger.warning("%s not found, writing raw rgb24 %sx%s frames at %s fps to %s", self.encoder, self.size[0], self.size[1], self.fps, path)
+            self.stream = open(path, "wb")
+
+    # copies a frame into a free buffer, or drops it when there is none
+    def capture(self, surface):
+        start = time.perf_counter()
+        self.frame += 1
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        if surface.get_size() == self.size:
+            buffer.blit(surface, (0, 0))
+        else:
+            pygame.transform.scale(surface, self.size, buffer)
+        self.pending.put((self.frame, buffer))
+        self.captured += 1
+        elapsed = time.perf_counter() - start
+        self.captureTime += elapsed
+        self.maxCaptureTime = max(self.maxCaptureTime, elapsed)
+        return True
+
+    # lowers the priority of the calling thread, only Linux schedules threads on their own niceness
+    def lower_priority(self):
+        if not self.writerNice or not hasattr(os, "setpriority") or not hasattr(threading, "get_native_id"):
+            return
+        try:
+            thread = threading.get_native_id()
+            os.setpriority(os.PRIO_PROCESS, thread, os.getpriority(os.PRIO_PROCESS, thread) + self.writerNice)
+        except OSError:
+            logger.debug("Could not lower the priority of %s", threading.current_thread().name)
+
+    # a writer thread, writes frames until it is handed None
+    def write_frames(self):
+        self.lower_priority()
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            number, buffer = item
+            try:
+                if self.format == "raw":
+                    self.stream.write(pygame.image.tobytes(buffer, "RGB"))
+                else:
+                    pygame.image.save(buffer, os.path.join(self.directory, f"frame_{number:06d}.png"))
+                with self.lock:
+                    self.written += 1
+            except Exception:
+                logger.exception("Could not write frame %s", number)
+            finally:
+                self.free.put(buffer)
+
+    # waits for the frames already captured to be written and stops the writers
+    def stop(self):
+        for _ in self.threads:
+            self.pending.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        if self.process is not None:
+            self.process.wait()
+            self.process = None
+        logger.info(self.summary())
+
+    def summary(self):
+        average = self.captureTime / self.captured if self.captured else 0
+        return f"Recorded {self.written} of {self.frame} frames to {self.directory}, {self.dropped} dropped, capture {average * 1000:.2f}ms average and {self.maxCaptureTime * 1000:.2f}ms at most"
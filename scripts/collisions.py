@@ -0,0 +1,188 @@
+# Modules
+import pygame
+import logging
+
+# Scripts
+from scripts.spatial import get_bounds
+
+logger = logging.getLogger(__name__)
+
+# which tags collide with each other, the order of each pair does not matter
+COLLISION_MATRIX = (
+    ("spaceship", "asteroid"),
+    ("spaceship", "ufo"),
+    ("spaceship", "health"),
+    ("spaceship", "reload"),
+    ("ufo", "asteroid"),
+    ("lasarbeam", "asteroid"),
+    ("lasarbeam", "ufo"),
+    ("piercing", "asteroid"),
+    ("piercing", "ufo"),
+    ("spread", "asteroid"),
+    ("spread", "ufo"),
+    ("missile", "asteroid"),
+    ("missile", "ufo"),
+)
+
+class Collider:
+    """
+    Describes the shape an entity collides with. Circles and boxes are cheap to test, masks are pixel perfect and only used where the shape asks for them.
+    """
+    def __init__(self, shape="aabb", radius=0, swept=False):
+        self.shape = shape  # "aabb", "circle" or "mask"
+        self.radius = radius
+        self.swept = swept  # tests the whole path travelled this tick instead of only where it ended
+
+# the shape a mask falls back to when collisions are approximate
+def approximate_collider(entity):
+    return Collider("circle", min(entity.size) / 2)
+
+# checks whether a circle overlaps a rect using the closest point on the rect
+def circle_rect(center, radius, rect):
+    x = max(rect.left, min(center[0], rect.right))
+    y = max(rect.top, min(center[1], rect.bottom))
+    return (center[0] - x) ** 2 + (center[1] - y) ** 2 <= radius ** 2
+
+# checks whether a line segment passes within a radius of a point
+def segment_circle(start, end, center, radius):
+    segment = pygame.math.Vector2(end) - start
+    toCenter = pygame.math.Vector2(center) - start
+    length = segment.length_squared()
+    t = 0 if length == 0 else max(0, min(1, toCenter.dot(segment) / length))
+    closest = pygame.math.Vector2(start) + segment * t
+    return closest.distance_squared_to(center) <= radius ** 2
+
+class CollisionWorld:
+    """
+    Owns the single collision pass of each tick. Only the tag pairs in the collision matrix are tested and every unordered pair of entities is tested once. Contacts are kept in a set so that each entity is told when a contact begins, stays and ends.
+
+    Each pair is narrowed down in tiers, first by bounding boxes, then by circles and only then by pixel masks if one of the colliders is a mask. With an approximate fidelity masks are swapped for circles. Swept colliders are tested along the path they travelled this tick so fast projectiles cannot skip past circles at low tick rates.
+    """
+    def __init__(self, matrix=COLLISION_MATRIX, fidelity="exact", sweep=True):
+        self.fidelity = fidelity
+        self.sweep = sweep
+        self.stats = {"aabb": 0, "swept": 0, "circle": 0, "mask": 0}
+        self.jobs = None  # splits the narrowphase over worker threads when set
+        self.pairs = []
+        for pair in matrix:
+            key = tuple(sorted(pair))
+            if key not in self.pairs:
+                self.pairs.append(key)
+        self.contacts = set()
+
+    # gets the collider used for an entity at the current fidelity
+    def get_collider(self, entity):
+        if entity.collider.shape == "mask" and self.fidelity == "approximate":
+            return approximate_collider(entity)
+        return entity.collider
+
+    # tests the path a swept entity travelled this tick against a circle
+    def test_swept(self, mover, moverCollider, target, targetCollider, stats):
+        previous = mover.rect.move(mover.previousTransform.x - mover.transform.x, mover.previousTransform.y - mover.transform.y)
+        if not mover.rect.union(previous).colliderect(target.rect):
+            return False
+        stats["swept"] += 1
+        radius = min(mover.size) / 2
+        return segment_circle(previous.center, mover.rect.center, target.rect.center, targetCollider.radius + radius)
+
+    # tests whether two entities overlap, starting with the cheapest test
+    def test(self, a, b, stats=None):
+        stats = self.stats if stats is None else stats
+        stats["aabb"] += 1
+        colliderA = self.get_collider(a)
+        colliderB = self.get_collider(b)
+        if self.sweep:
+            if colliderA.swept and colliderB.shape == "circle":
+                return self.test_swept(a, colliderA, b, colliderB, stats)
+            if colliderB.swept and colliderA.shape == "circle":
+                return self.test_swept(b, colliderB, a, colliderA, stats)
+
+        if not a.rect.colliderect(b.rect):
+            return False
+
+        if colliderA.shape == "mask" or colliderB.shape == "mask":
+            stats["mask"] += 1
+            return pygame.sprite.collide_mask(a, b) is not None
+
+        if colliderA.shape == "circle" and colliderB.shape == "circle":
+            stats["circle"] += 1
+            distance = pygame.math.Vector2(a.rect.center).distance_squared_to(b.rect.center)
+            return distance <= (colliderA.radius + colliderB.radius) ** 2
+        if colliderA.shape == "circle":
+            stats["circle"] += 1
+            return circle_rect(a.rect.center, colliderA.radius, b.rect)
+        if colliderB.shape == "circle":
+            stats["circle"] += 1
+            return circle_rect(b.rect.center, colliderB.radius, a.rect)
+        return True
+
+    # tests a run of entities against every entity of a tag they share grid cells with, with their own stats so runs can be tested at once
+    def test_entities(self, entities, tagA, tagB, spatial):
+        found = []
+        stats = dict.fromkeys(self.stats, 0)
+        for a in entities:
+            for b in spatial.query_rect(tagB, get_bounds(a)):
+                if tagA == tagB:
+                    # test each pair once, in the same order every tick so it matches its contact
+                    if id(a) >= id(b):
+                        continue
+                if self.test(a, b, stats):
+                    found.append((a, b))
+        return found, stats
+
+    # finds every overlapping pair of entities, only testing the ones that share grid cells
+    def find_contacts(self, spatial):
+        found = []
+        for tagA, tagB in self.pairs:
+            entitiesA = spatial.entities.get(tagA)
+            if not entitiesA or not spatial.entities.get(tagB):
+                continue
+            if self.jobs is None:
+                results = [self.test_entities(entitiesA, tagA, tagB, spatial)]
+            else:
+                results = self.jobs.parallel_for(len(entitiesA), lambda start, stop: self.test_entities(entitiesA[start:stop], tagA, tagB, spatial), phase="collisions")
+            # runs are joined in order, so contacts are dispatched in the same order at any worker count
+            for runFound, runStats in results:
+                found.extend(runFound)
+                for tier, count in runStats.items():
+                    self.stats[tier] += count
+        return found
+
+    # delivers begin and stay events for the current contacts and end events for the ones that stopped
+    def dispatch(self, found):
+        current = set()
+        for a, b in found:
+            # an earlier contact this tick may have killed one of them
+            if not a.alive() or not b.alive():
+                continue
+            current.add((a, b))
+            if (a, b) in self.contacts:
+                a.contact_stay(b)
+                b.contact_stay(a)
+            else:
+                a.contacts.add(b)
+                b.contacts.add(a)
+                a.contact_begin(b)
+                b.contact_begin(a)
+
+        for a, b in self.contacts - current:
+            a.contacts.discard(b)
+            b.contacts.discard(a)
+            if a.alive() and b.alive():
+                a.contact_end(b)
+                b.contact_end(a)
+
+        self.contacts = current
+
+    # removes every contact
+    def clear(self):
+        for a, b in self.contacts:
+            a.contacts.discard(b)
+            b.contacts.discard(a)
+        self.contacts = set()
+
+    # runs the collision pass over every entity in the spatial grid
+    def update(self, spatial):
+        for tier in self.stats:
+            self.stats[tier] = 0
+        self.dispatch(self.find_contacts(spatial))
@@ -1,3 +1,4 @@
 import pygame
 
-BASE_IMG_PATH = "data/assets/"
\ No newline at end of file
+BASE_IMG_PATH = "data/assets/"
+ANIMATION_DATA_PATH = "data/animation_data.json"
\ No newline at end of file
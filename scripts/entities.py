@@ -11,52 +11,39 @@ from scripts.input import Controller, Keyboard
 from scripts.animation import Animation
 from scripts.camera import Camera
 from scripts.particles import Particle, ParticleSystem
+from scripts.collisions import Collider
+from scripts.registry import ModifiedSpriteGroup
+from scripts.archetypes import ArchetypeField
+from scripts.events import AsteroidMissed, AsteroidDestroyed
 
 logger = logging.getLogger(__name__)
 
-class ModifiedSpriteGroup(pygame.sprite.Group):
-    def __init__(self):
-        super().__init__()
-
-    def get_entity(self, index):
-        return self.sprites()[index]
-    
-class Background(pygame.sprite.Sprite):
-    def __init__(self, transform, image, camLayer=0, isScroll=True):
-        super().__init__()
-        self.transform = pygame.math.Vector2(transform)
-        self.img = image
-        self.size = self.img.get_width(), self.img.get_height()
-        self.camLayer = camLayer
-        self.isScroll = isScroll
-        self.rect = pygame.Rect(self.transform.x, self.transform.y, self.size[0], self.size[1])
-        self.rotation = 0
-        self.flip = False
-
-    @property
-    def width(self):
-        return self.size[0]
-    
-    @property
-    def height(self):
-        return self.size[1]
-    
-    @property
-    def image(self):
-        return pygame.transform.rotate(pygame.transform.flip(self.img, self.flip, False), self.rotation).convert_alpha()
-    
-    def update(self, dt):
-        self.update_animation(dt)
-        self.rect.x = self.transform.x
-        self.rect.y = self.transform.y
-
 class Entity(pygame.sprite.Sprite):
-    def __init__(self, transform:tuple[int, int], size:tuple[int, int], tag:str, assets:dict[str, Animation], camLayer=0, isScroll=True, animation="idle"):
+    # constants shared through an archetype, entities without one hold their own
+    archetype = None
+    tag = ArchetypeField()
+    size = ArchetypeField()
+    speed = ArchetypeField()
+    collider = ArchetypeField()
+
+    # defaults that most entities never change, they only get their own value once one is set
+    canRemove = False
+    hide = False
+    timers = None
+    anim_offset: tuple[int, int] = (0, 0)
+    registry = None
+    entityId = None
+    dying = False
+
+    def __init__(self, transform:tuple[int, int], size:tuple[int, int], tag:str, assets:dict[str, Animation], camLayer=0, isScroll=True, animation="idle", archetype=None):
         super().__init__()
         # parameters
         self.transform = pygame.math.Vector2(transform)
-        self.size = size
-        self.tag = tag
+        if archetype is not None:
+            self.archetype = archetype
+        else:
+            self.size = size
+            self.tag = tag
         self.assets = assets
         self.camLayer = camLayer
         self.isScroll = isScroll
@@ -66,19 +53,22 @@ class Entity(pygame.sprite.Sprite):
         self.flip = False
         self.directions: dict[str, bool] = {"left" : False, "right": False, "up": False, "down": False}
         self.movement = pygame.math.Vector2()
-        self.speed = 100
-        self.canRemove = False
-        self.hide = False
+        if self.archetype is None:
+            self.speed = 100
         
         # animation
         self.action: str = ""
-        self.anim_offset: tuple[int, int] = (0, 0)
         self.anim = animation
 
         self.set_action(self.anim)
         
         self.rect: pygame.Rect = pygame.Rect(self.transform.x, self.transform.y, self.size[0], self.size[1])
-        self.entityCollisions = ModifiedSpriteGroup()
+        self.contacts = set()
+        if self.archetype is None:
+            self.collider = Collider("aabb")
+
+        # registry
+        self.memberships = set()
 
     @property
     def width(self):
@@ -90,15 +80,26 @@ class Entity(pygame.sprite.Sprite):
     
     @property
     def image(self):
+        variants = self.animation.animation.variants
+        if variants is not None and self.rotation % 90 == 0:
+            return variants.image(self.animation.frame, self.rotation, self.flip)
         return pygame.transform.rotate(pygame.transform.flip(self.animation.img(), self.flip, False), self.rotation).convert_alpha()
 
+    # the mask pixel perfect collisions test against, made from the image unless the sprite cache has it
+    @property
+    def mask(self):
+        variants = self.animation.animation.variants
+        if variants is not None and self.rotation % 90 == 0:
+            return variants.mask(self.animation.frame, self.rotation, self.flip)
+        return pygame.mask.from_surface(self.image)
+
     def copy(self):
         return self.__class__(self.transform, self.size, self.tag, self.assets, self.camLayer, self.isScroll, self.anim)
     # sets an animation action
     def set_action(self, action):
         if action != self.action:
             self.action = action
-            self.animation = self.assets[self.tag + "/" + self.action].copy()
+            self.animation = self.assets[self.tag + "/" + self.action].play()
 
     def calculate_direction(self) -> pygame.math.Vector2:
         direction = pygame.math.Vector2()
@@ -117,10 +118,6 @@ class Entity(pygame.sprite.Sprite):
     def set_rotation(self, rotation):
         self.rotation = rotation
 
-    # updates the current frame of an animation
-    def update_animation(self, dt):
-        self.animation.update(dt)
-
     # gets the center of the entity
     def get_center(self):
         x = self.transform.x + (self.width // 2)
@@ -157,31 +154,68 @@ class Entity(pygame.sprite.Sprite):
         return math.sqrt(dis_x ** 2 + dis_y ** 2)
     
     def update(self, dt):
-        self.update_animation(dt)
         self.rect.x = self.transform.x
         self.rect.y = self.transform.y
 
-    def check_collisions(self, *groups):
-        for group in groups:
-            for sprite in group:
-                if pygame.sprite.collide_mask(self, sprite):
-                    self.handle_collision(sprite)
-                    sprite.handle_collision(self)
-                else:
-                    if self.entityCollisions.has(sprite):
-                        self.entityCollisions.remove(sprite)
-                        sprite.entityCollisions.remove(self)
+    # called by the collision world when this entity starts touching another
+    def contact_begin(self, other):
+        pass
+
+    # called by the collision world every tick this entity is still touching another
+    def contact_stay(self, other):
+        pass
 
-    def handle_collision(self, other):
-        if not self.entityCollisions.has(other):
-            self.entityCollisions.add(other)
+    # called by the collision world when this entity stops touching another
+    def contact_end(self, other):
+        pass
+
+    # whether the entity is in a group and has not been killed this tick
+    def alive(self):
+        return bool(self.memberships) and not self.dying
+
+    # removes the entity from every group, at the end of the tick if it belongs to a registry
+    def kill(self):
+        if self.registry is not None:
+            self.registry.kill(self)
+        else:
+            for group in list(self.memberships):
+                group.remove(self)
     
 class PhysicsEntity(Entity):
-    def __init__(self, transform:tuple[int, int], size:tuple[int, int], tag:str, assets:dict[str, Animation], layer=0, isScroll=True, animation="idle"):
+    mover = None
+
+    def __init__(self, transform:tuple[int, int], size:tuple[int, int], tag:str, assets:dict[str, Animation], layer=0, isScroll=True, animation="idle", archetype=None):
         # Parameters
-        super().__init__(transform, size, tag, assets, layer, isScroll, animation)
+        super().__init__(transform, size, tag, assets, layer, isScroll, animation, archetype)
         # Rects and Collisions
         self.collisions: dict[str, bool] = {'bottom': False, 'top': False, 'left': False, 'right': False}
+        self.lifetime = archetype.lifetime if archetype is not None else None
+        self.previousTransform = self.transform.copy()
+
+    # hands straight line movement over to a mover store, which also schedules when it exits or expires
+    def attach_mover(self, store, velocity, margins=(25, 25, 25, 25)):
+        self.mover = store
+        self.previousTransform = self.transform.copy()
+        store.add(self, velocity, margins, self.lifetime)
+
+    # changes the velocity of an entity held in a mover store
+    def set_velocity(self, velocity):
+        if self.mover is not None:
+            self.mover.set_velocity(self, velocity)
+
+    # called by the kinetic queue once the entity has left the screen
+    def exit_bounds(self, game):
+        self.kill()
+
+    # called by the kinetic queue once the entity's lifetime has run out
+    def expire(self, game):
+        self.kill()
+
+    def kill(self):
+        if self.mover is not None:
+            self.mover.remove(self)
+            self.mover = None
+        super().kill()
 
     # Checks for collisions based on movement direction
     def move(self, movement, tiles, dt):
@@ -222,9 +256,9 @@ class Player(PhysicsEntity):
         self.weapons = []
         self.weapon = None
         self.input = None
+        self.moveInput = (0, 0)  # how far this tick's input pushes each axis
         self.canBeDamaged = True
         self.damageTimer = 0.3
-        self.currentDamageTimer = 0
 
         self.acceleration = pygame.math.Vector2()
         self.velocity = pygame.math.Vector2()
@@ -236,8 +270,7 @@ class Player(PhysicsEntity):
         self.dashDuration = 0.2
         self.dashCooldown = 1.0
         self.isDashing = False
-        self.dashTimer = 0
-        self.dashCooldownTimer = 0
+        self.canDash = True
         self.dashDirection = pygame.math.Vector2()
 
         center = self.get_center()
@@ -248,110 +281,47 @@ class Player(PhysicsEntity):
         self.loadingSpinnerTemplate = Entity(self.get_center(), (16, 16), "spinner", self.assets, self.camLayer + 1)
         self.spinner = None
         self.activePowerUps = ModifiedSpriteGroup()
+        self.collider = Collider("mask")
 
-    def event_handler(self, event, game):
-        if self.input is not None:
-            if isinstance(self.input, Controller):
-                self.controller_input(event, game)
-            else:
-                self.keyboard_input(event, game)
-
-    def keyboard_input(self, event, game):
-        if event.type == pygame.KEYDOWN:
-            if event.key == self.input.controls.moveLeft:
-                self.directions["left"] = True
-            if event.key == self.input.controls.moveRight:
-                self.directions["right"] = True
-            if event.key == self.input.controls.moveUp:
-                self.directions["up"] = True
-            if event.key == self.input.controls.moveDown:
-                self.directions["down"] = True
-            if event.key == self.input.controls.reload:
-                if self.weapon:
-                    if self.weapon.canReload:
-                        if self.weapon.magazine < self.weapon.maxMagazine:
-                            self.weapon.reload()
-                            self.spinner = self.loadingSpinnerTemplate.copy()
-                            game.add_to_world(self.spinner)
-            if event.key == self.input.controls.shoot:
-                if self.weapon:
-                    if self.weapon.isAutomatic:
-                        self.weapon.shooting = True
-                    else:
-                        self.weapon.shoot(game, self.transform)
-            if event.key == self.input.controls.dash:
-                self.dash()
-            if event.key == self.input.controls.swapWeapon:
-                self.swap_weapon(+1)
-
-        elif event.type == pygame.KEYUP:
-            if event.key == self.input.controls.moveLeft:
-                self.directions["left"] = False
-            if event.key == self.input.controls.moveRight:
-                self.directions["right"] = False
-            if event.key == self.input.controls.moveUp:
-                self.directions["up"] = False
-            if event.key == self.input.controls.moveDown:
-                self.directions["down"] = False
-            if event.key == self.input.controls.shoot:
-                if self.weapon:
-                    if self.weapon.isAutomatic:
-                        self.weapon.shooting = False
-
-
-    def controller_input(self, event, game):
-        if self.input.leftStick.x > 0:
-            self.directions["right"] = True
-            self.directions["left"] = False
-        elif self.input.leftStick.x < 0:
-            self.directions["left"] = True
-            self.directions["right"] = False
-        else:
-            self.directions["left"] = False
-            self.directions["right"] = False
-
-        if self.input.leftStick.y > 0:
-            self.directions["down"] = True
-            self.directions["up"] = False
-        elif self.input.leftStick.y < 0:
-            self.directions["up"] = True
-            self.directions["down"] = False
-        else:
-            self.directions["down"] = False
-            self.directions["up"] = False
-
-        if event.type == pygame.JOYBUTTONDOWN:
-            if event.button == self.input.controls.reload:
-                if self.weapon:
-                    if self.weapon.canReload:
-                        if self.weapon.magazine < self.weapon.maxMagazine:
-                            self.weapon.reload()
-                            self.spinner = self.loadingSpinnerTemplate.copy()
-                            game.add_to_world(self.spinner)
-            if event.button == self.input.controls.dash:
-                self.dash()
-            if event.button == self.input.controls.swapWeapon:
-                self.swap_weapon(+1)
-
-        if self.input.rightTrigger.down:
+    # acts on this tick's snapshot of actions
+    def handle_input(self, actions, game):
+        self.directions["left"] = actions.is_held("moveLeft")
+        self.directions["right"] = actions.is_held("moveRight")
+        self.directions["up"] = actions.is_held("moveUp")
+        self.directions["down"] = actions.is_held("moveDown")
+        self.moveInput = actions.move
+
+        if actions.was_pressed("reload"):
+            if self.weapon:
+                if self.weapon.canReload:
+                    if self.weapon.magazine < self.weapon.maxMagazine:
+                        self.weapon.reload()
+                        self.spinner = self.loadingSpinnerTemplate.copy()
+                        game.add_to_world(self.spinner)
+        if actions.was_pressed("shoot"):
             if self.weapon:
                 if self.weapon.isAutomatic:
                     self.weapon.shooting = True
                 else:
                     self.weapon.shoot(game, self.transform)
-        if self.input.rightTrigger.up:
+        if actions.was_pressed("dash"):
+            self.dash()
+        if actions.was_pressed("swapWeapon"):
+            self.swap_weapon(+1)
+        if actions.was_released("shoot"):
             if self.weapon:
                 if self.weapon.isAutomatic:
                     self.weapon.shooting = False
 
-    def update_timers(self, dt):
-        if self.currentDamageTimer < 0:
-            self.canBeDamaged = True
-        else:
-            self.currentDamageTimer -= dt
+    def end_damage_cooldown(self):
+        self.canBeDamaged = True
+
+    def end_dash(self):
+        self.isDashing = False
+        self.timers.schedule(self.dashCooldown, self.end_dash_cooldown)
 
-        if self.dashCooldownTimer > 0:
-            self.dashCooldownTimer -= dt
+    def end_dash_cooldown(self):
+        self.canDash = True
 
     def remove_player(self):
         if self.explosion == None:
@@ -361,7 +331,6 @@ class Player(PhysicsEntity):
                 self.kill()
 
     def update_spinner(self, dt):
-        self.spinner.update_animation(dt)
         self.spinner.transform = self.transform.copy()
         self.spinner.transform.x += 5
         self.spinner.transform.y += -1
@@ -542,18 +511,14 @@ class Player(PhysicsEntity):
         if self.canBeDamaged:
             self.canBeDamaged = False
             self.health -= damage
-            self.currentDamageTimer = self.damageTimer
+            self.timers.schedule(self.damageTimer, self.end_damage_cooldown)
             self.explosion = Entity(self.transform, (32, 32), "explosion", self.assets, self.camLayer+1)
 
-    def handle_collision(self, sprite):
-        if sprite.tag == "ufo" or sprite.tag == "asteroid":
-            if not self.entityCollisions.has(sprite):
-                self.take_damage(sprite.damage)
-        if sprite.tag in ["health", "reload"]:
-            print("hi")
-            self.handle_item(sprite)
-
-        super().handle_collision(sprite)
+    def contact_begin(self, other):
+        if other.tag == "ufo" or other.tag == "asteroid":
+            self.take_damage(other.damage)
+        if other.tag in ["health", "reload"]:
+            self.handle_item(other)
 
     def handle_explosion(self, game):
         if not game.explosions.has(self.explosion):
@@ -561,6 +526,7 @@ class Player(PhysicsEntity):
                 game.explosions.add(self.explosion)
                 game.add_to_world(self.explosion)
                 game.window.shake_screen(40)
+                game.window.flash_screen(0.5)
     
         if self.explosion:
             self.explosion.update(game.dt)
@@ -575,34 +541,14 @@ class Player(PhysicsEntity):
         if self.isDashing:
             # During dash, move at dash speed
             self.velocity = self.dashDirection * self.dashSpeed
-            self.dashTimer -= dt
             self.dash_particles()
-            if self.dashTimer <= 0:
-                self.isDashing = False
-                self.dashCooldownTimer = self.dashCooldown
         else:
             # Reset acceleration
             self.acceleration.update(0, 0)
 
-            # Apply acceleration based on input directions
-            if isinstance(self.input, Controller):
-                if self.directions["right"]:
-                    self.acceleration.x += self.accelerationRate * self.input.leftStick.x
-                if self.directions["left"]:
-                    self.acceleration.x += self.accelerationRate * self.input.leftStick.x
-                if self.directions["up"]:
-                    self.acceleration.y += self.accelerationRate * self.input.leftStick.y
-                if self.directions["down"]:
-                    self.acceleration.y += self.accelerationRate * self.input.leftStick.y
-            else:
-                if self.directions["right"]:
-                    self.acceleration.x += self.accelerationRate
-                if self.directions["left"]:
-                    self.acceleration.x -= self.accelerationRate
-                if self.directions["up"]:
-                    self.acceleration.y -= self.accelerationRate
-                if self.directions["down"]:
-                    self.acceleration.y += self.accelerationRate
+            # Apply acceleration based on how far the input pushes each axis
+            self.acceleration.x += self.accelerationRate * self.moveInput[0]
+            self.acceleration.y += self.accelerationRate * self.moveInput[1]
 
             # Update velocity with acceleration
             self.velocity += self.acceleration * dt
@@ -646,10 +592,11 @@ class Player(PhysicsEntity):
         return direction.normalize()
 
     def dash(self):
-        if not self.isDashing and self.dashCooldownTimer <= 0:
+        if not self.isDashing and self.canDash:
             self.isDashing = True
-            self.dashTimer = self.dashDuration
+            self.canDash = False
             self.dashDirection = self.calculate_dash_direction()
+            self.timers.schedule(self.dashDuration, self.end_dash)
 
     def handle_item(self, item):
         if item.tag == "health":
@@ -661,15 +608,10 @@ class Player(PhysicsEntity):
 
     def update(self, tiles, dt, camera: Camera, game):
         self.update_movement(dt)
-        self.update_animation(dt)
         self.update_particles(dt, camera, self.transform)
-        self.check_collisions(game.ufos, game.asteroids)
         self.handle_explosion(game)
-        self.update_timers(dt)
-        self.check_bounds(game.window.world.screenSize)
+        self.check_bounds(game.get_world_size())
 
-        if self.input:
-            self.input.update()
         if self.weapon:
             self.weapon.update(game, self.get_center())
         if self.spinner:
@@ -682,19 +624,22 @@ class Player(PhysicsEntity):
         #camera.draw_rect((255, 0, 0), self.rect)
 
 class UFO(PhysicsEntity):
-    def __init__(self, transform, size, tag, assets, layer=1, isScroll=True):
-        super().__init__(transform, size, tag, assets, layer, isScroll)
+    damage = ArchetypeField()
+    rotationSpeed = ArchetypeField()
+    spawnTime = ArchetypeField()
+
+    def __init__(self, transform, archetype, assets, isScroll=True):
+        super().__init__(transform, archetype.size, archetype.tag, assets, archetype.layer, isScroll, archetype=archetype)
         self.arrow = Entity(transform, (27, 14), "arrow", assets, animation="enter")
-        self.speed = 150
         self.changeRotation = 1
-        self.rotationSpeed = 50
-        self.spawnTime = 1
-        self.currentSpawnTime = self.spawnTime
+        self.arrowLeaving = False
         self.canMove = False
-        self.damage = 20
         self.spawned = False
         self.item = None
 
+    def copy(self):
+        return self.__class__(self.transform, self.archetype, self.assets, self.isScroll)
+
     def spawn(self, screenSize):
         border = random.randint(1, 2)
         offset = pygame.math.Vector2(25, 10)
@@ -734,21 +679,24 @@ class UFO(PhysicsEntity):
         self.directions[direction] = True
         self.arrow.set_action("enter")
         self.spawned = True
+        self.timers.schedule(self.spawnTime, self.end_warning)
 
-    def update_timers(self, dt):
+    # the warning arrow starts leaving once the spawn time is up
+    def end_warning(self):
+        self.arrowLeaving = True
         if self.arrow:
-            if self.currentSpawnTime < 0:
-                self.arrow.set_action("exit")
-
-                if self.arrow.animation.done:
-                    self.arrow.kill()
-                    self.arrow = None
-                    self.canMove = True
-                    self.movement.x = (0 if self.canMove == False else 1 if self.directions["right"] else -1 if self.directions["left"] else 0) * self.speed
-                    self.movement.y = (0 if self.canMove == False else 1 if self.directions["down"] else -1 if self.directions["up"] else 0) * self.speed
-            else:
+            self.arrow.set_action("exit")
+
+    def update_arrow(self):
+        if self.arrow:
+            if not self.arrowLeaving:
                 self.arrow.set_action("idle")
-                self.currentSpawnTime -= dt
+            elif self.arrow.animation.done:
+                self.arrow.kill()
+                self.arrow = None
+                self.canMove = True
+                self.movement.x = (0 if self.canMove == False else 1 if self.directions["right"] else -1 if self.directions["left"] else 0) * self.speed
+                self.movement.y = (0 if self.canMove == False else 1 if self.directions["down"] else -1 if self.directions["up"] else 0) * self.speed
 
     def ufo_rotating_animation(self, dt):
         self.rotation += self.rotationSpeed * dt * self.changeRotation
@@ -773,13 +721,18 @@ class UFO(PhysicsEntity):
             elif self.transform.y < -100:
                 self.kill()
 
-    def handle_collision(self, sprite):
-        if sprite.tag == "spaceship":
+    # its warning arrow goes with it
+    def kill(self):
+        if self.arrow:
+            self.arrow.kill()
+            self.arrow = None
+        super().kill()
+
+    def contact_begin(self, other):
+        if other.tag == "spaceship":
             self.kill()
-        if sprite.tag == "asteroid":
-            if not self.entityCollisions.has(sprite):
-                self.reflect()
-        super().handle_collision(sprite)
+        if other.tag == "asteroid":
+            self.reflect()
 
     def reflect(self):
         reflectionAngle = random.uniform(0, 2 * math.pi)
@@ -788,35 +741,42 @@ class UFO(PhysicsEntity):
         
 
     def update(self, dt, camera, game):
-        self.update_animation(dt)
         self.ufo_rotating_animation(dt)
-        self.update_timers(dt)
+        self.update_arrow()
         self.movement_directions()
         self.move(self.movement, [], dt)
-        self.check_bounds(camera.screenSize)
-        self.check_collisions(game.players, game.asteroids)
+        self.check_bounds(game.get_world_size())
         #camera.draw_rect((255, 0, 0), self.rect)
 
 class Asteroid(PhysicsEntity):
-    def __init__(self, transform, size, tag, assets, layer=1, isScroll=True, animation="idle"):
-        super().__init__(transform, size, tag, assets, layer, isScroll, animation)
+    damage = ArchetypeField()
+    localRotationSpeed = ArchetypeField("rotationSpeed")
+    boundsMargins = ArchetypeField()
+
+    def __init__(self, transform, archetype, assets, isScroll=True, animation="idle"):
+        super().__init__(transform, archetype.size, archetype.tag, assets, archetype.layer, isScroll, animation, archetype)
         self.targetTransform = pygame.math.Vector2()
-        self.speed = 50
         self.localRotation = 0
-        self.localRotationSpeed = 100
-        self.damage = 30
-        self.health = 100
+        self.health = archetype.health
         self.spawned = False
         self.direction = pygame.math.Vector2(0, 0)
         self.item = None
         self.game = None
 
+    def copy(self):
+        return self.__class__(self.transform, self.archetype, self.assets, self.isScroll, self.anim)
+
     @property
     def image(self):
         rotated_image = pygame.transform.rotate(self.animation.img(), self.localRotation)
         self.rect = rotated_image.get_rect(center=self.get_center())
         return rotated_image
 
+    # turns on its own, so the mask always comes from the image
+    @property
+    def mask(self):
+        return pygame.mask.from_surface(self.image)
+
     def calculate_direction(self) -> pygame.math.Vector2:
         direction = super().calculate_direction()
         direction *= self.speed
@@ -855,19 +815,21 @@ class Asteroid(PhysicsEntity):
         if self.health <= 0:
             self.generate_item()
 
-    def handle_collision(self, sprite):
-        if sprite.tag == "spaceship":
+    def contact_begin(self, other):
+        if other.tag == "spaceship":
             self.kill()
-            pygame.event.post(pygame.event.Event((self.game.ASTEROID_MISSED)))
-        if sprite.tag in ["lasarbeam", "piercing", "spread"]:
-            if not self.entityCollisions.has(sprite):
-                self.take_damage(sprite.damage)
-            self.set_action("hit")
-        if sprite.tag == "missile":
-            self.take_damage(sprite.damage)
+            self.game.events.publish(AsteroidMissed(self))
+        if other.tag in ["lasarbeam", "piercing", "spread", "missile"]:
+            self.take_damage(other.damage)
             self.set_action("hit")
 
-        super().handle_collision(sprite)
+    def contact_stay(self, other):
+        if other.tag in ["lasarbeam", "piercing", "spread"]:
+            self.set_action("hit")
+        # missiles keep doing damage for as long as they touch
+        if other.tag == "missile":
+            self.take_damage(other.damage)
+            self.set_action("hit")
 
     def asteroid_particles(self, center, particles):
         speedMultiplier = 1.4
@@ -904,32 +866,18 @@ class Asteroid(PhysicsEntity):
         
         particles.add(brown, darkbrown, black)
 
-    def check_bounds(self, screenSize):
-        if self.transform.x < -100:
-            self.kill()
-            pygame.event.post(pygame.event.Event(self.game.ASTEROID_MISSED))
-        if self.transform.x > screenSize[0] + 100:
-            self.kill()
-            pygame.event.post(pygame.event.Event(self.game.ASTEROID_MISSED))
-        if self.transform.y < -400:
-            self.kill()
-            pygame.event.post(pygame.event.Event(self.game.ASTEROID_MISSED))
-        if self.transform.y > screenSize[1]:
-            self.kill()
-            pygame.event.post(pygame.event.Event(self.game.ASTEROID_MISSED))
+    def exit_bounds(self, game):
+        self.kill()
+        game.events.publish(AsteroidMissed(self))
         
     def update(self, dt, game):    
-        self.move(self.direction, [], dt)
-        self.animation.update(dt)
-        self.check_collisions(game.players)
-        self.check_bounds(game.window.world.screenSize)
         self.check_items(game)
         self.game = game
 
         if self.item == None and self.health < 0:
             self.kill()
             game.score += 25
-            pygame.event.post(pygame.event.Event(game.ASTEROID_DESTROYED))
+            game.events.publish(AsteroidDestroyed(self))
 
         if self.action != "idle":
             if self.animation.done:
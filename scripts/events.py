@@ -0,0 +1,62 @@
+# Modules
+import logging
+from dataclasses import dataclass
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class GameEvent:
+    pass
+
+@dataclass(frozen=True)
+class AsteroidSpawned(GameEvent):
+    asteroid: object
+
+@dataclass(frozen=True)
+class AsteroidMissed(GameEvent):
+    asteroid: object
+
+@dataclass(frozen=True)
+class AsteroidDestroyed(GameEvent):
+    asteroid: object
+
+class EventBus:
+    """
+    Passes gameplay events between systems without going through the SDL event queue, which is left for real input. Events published during a tick are held and delivered together when the tick dispatches them, in the order they were published, to the callbacks subscribed to their exact type.
+    """
+    def __init__(self):
+        self.subscribers = {}  # event type -> [callbacks]
+        self.pending = []
+
+    def subscribe(self, eventType, callback):
+        self.subscribers.setdefault(eventType, []).append(callback)
+
+    def unsubscribe(self, eventType, callback):
+        callbacks = self.subscribers.get(eventType)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+
+    # queues an event for the next dispatch
+    def publish(self, event):
+        self.pending.append(event)
+
+    # delivers an event straight away
+    def emit(self, event):
+        for callback in self.subscribers.get(type(event), ()):
+            callback(event)
+
+    # delivers every queued event, including the ones published while they are delivered
+    def dispatch(self):
+        delivered = 0
+        while delivered < len(self.pending):
+            self.emit(self.pending[delivered])
+            delivered += 1
+        self.pending = []
+        return delivered
+
+    # drops the queued events
+    def clear(self):
+        self.pending = []
@@ -23,6 +23,93 @@ class Controls:
     reload: int
     swapWeapon: int
 
+# every action a player can take
+ACTIONS = ("moveRight", "moveLeft", "moveDown", "moveUp", "dash", "pause", "shoot", "reload", "swapWeapon")
+
+class ActionSnapshot:
+    """
+    The actions of one input source for one tick: which are held, which were pressed or released during it, and how far the movement is pushed on each axis. Players only ever read these, so anything that produces them, a device, a replay or a bot, can drive a player.
+    """
+    __slots__ = ("held", "pressed", "released", "move", "stamps")
+
+    def __init__(self, held=frozenset(), pressed=frozenset(), released=frozenset(), move=(0, 0), stamps=None):
+        self.held = frozenset(held)
+        self.pressed = frozenset(pressed)
+        self.released = frozenset(released)
+        self.move = (move[0], move[1])  # from -1 to 1, analog sticks can push part of the way
+        self.stamps = stamps or {}  # action -> stamp of the first event that pressed or released it, for latency tracking
+
+    def is_held(self, action):
+        return action in self.held
+
+    def was_pressed(self, action):
+        return action in self.pressed
+
+    def was_released(self, action):
+        return action in self.released
+
+    # a plain form of the snapshot that can be saved with a replay
+    def to_dict(self):
+        return {"held": sorted(self.held), "pressed": sorted(self.pressed), "released": sorted(self.released), "move": list(self.move)}
+
+    @staticmethod
+    def from_dict(data):
+        return ActionSnapshot(data["held"], data["pressed"], data["released"], data["move"])
+
+EMPTY_ACTIONS = ActionSnapshot()
+
+class ActionState:
+    """
+    Collects the actions of an input source between snapshots. A press and release within the same tick both show up in its snapshot.
+    """
+    def __init__(self):
+        self.held = set()
+        self.pressed = set()
+        self.released = set()
+        self.stamps = {}
+        self.actions = EMPTY_ACTIONS  # the snapshot of the last poll
+
+    # every press counts, even of an action that is already held
+    def press(self, action, stamp=None):
+        self.held.add(action)
+        self.pressed.add(action)
+        self.stamp(action, stamp)
+
+    def release(self, action, stamp=None):
+        if action in self.held:
+            self.held.discard(action)
+            self.released.add(action)
+            self.stamp(action, stamp)
+
+    # remembers when the first event behind an action this tick was read
+    def stamp(self, action, stamp):
+        if stamp is not None and action not in self.stamps:
+            self.stamps[action] = stamp
+
+    # holds an action for as long as a condition is true, it is only pressed when it starts
+    def hold(self, action, held, stamp=None):
+        if held and action not in self.held:
+            self.press(action, stamp)
+        elif not held:
+            self.release(action, stamp)
+
+    # the movement of the held move actions
+    def get_move(self):
+        held = self.held
+        return ("moveRight" in held) - ("moveLeft" in held), ("moveDown" in held) - ("moveUp" in held)
+
+    # takes this tick's snapshot and starts collecting the next one
+    def take_snapshot(self):
+        self.actions = ActionSnapshot(self.held, self.pressed, self.released, self.get_move(), self.stamps)
+        self.pressed = set()
+        self.released = set()
+        self.stamps = {}
+        return self.actions
+
+# maps each code in a set of controls to its action, so events are looked up instead of compared against every control
+def create_bindings(controls, actions=ACTIONS):
+    return {getattr(controls, action): action for action in reversed(actions)}
+
 class Trigger:
     def __init__(self, axis):
         self.axis = axis
@@ -32,8 +119,8 @@ class Trigger:
         self.activated = False
         self.stop = 0
 
-    def get_trigger(self, joystick):
-        self.number = joystick.get_axis(self.axis)
+    def get_trigger(self, value):
+        self.number = value
         
         # Check if the trigger is pressed beyond the stop threshold
         if self.number > self.stop:
@@ -54,13 +141,21 @@ class Trigger:
             self.down = False
             self.up = False
 
-class Controller:
+class Controller(ActionState):
+    # only these actions are buttons, movement comes from the left stick and shooting from the right trigger
+    BUTTON_ACTIONS = ("dash", "pause", "reload", "swapWeapon")
+
     def __init__(self, controls:Controls, joystick):
+        super().__init__()
         # parameters
         self.controls = controls
+        self.bindings = create_bindings(controls, self.BUTTON_ACTIONS)  # button -> action
         self.joystick = joystick
         self.guid = joystick.get_guid()
         self.name = joystick.get_name()
+        self.axes = [0.0] * 6  # the last value of each axis, kept up to date by motion events
+        self.axisStamps = [None] * 6  # the stamp of the last motion event of each axis
+        self.read_axes()
         
         # controller sticks
         self.leftStick = pygame.math.Vector2()
@@ -78,6 +173,32 @@ class Controller:
         self.joystick = joystick
         self.guid = joystick.get_guid()
         self.name = joystick.get_name()
+        self.read_axes()
+
+    # reads every axis once, after that they are only changed by events
+    def read_axes(self):
+        for axis in range(min(len(self.axes), self.joystick.get_numaxes())):
+            self.axes[axis] = self.joystick.get_axis(axis)
+
+    # whether an event came from this controller's joystick
+    def owns(self, event):
+        return getattr(event, "instance_id", None) == self.joystick.get_instance_id()
+
+    # stamp is when the event was read, it follows the event into the action it causes
+    def handle_event(self, event, stamp=None):
+        if event.type not in (pygame.JOYAXISMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP) or not self.owns(event):
+            return
+        if event.type == pygame.JOYAXISMOTION:
+            if event.axis < len(self.axes):
+                self.axes[event.axis] = event.value
+                self.axisStamps[event.axis] = stamp
+        else:
+            action = self.bindings.get(event.button)
+            if action is not None:
+                if event.type == pygame.JOYBUTTONDOWN:
+                    self.press(action, stamp)
+                else:
+                    self.release(action, stamp)
 
     # controls the deadzone - input below deadzone value is set to 0 to stop stick drift
     def control_deadzone(self, deadzone, *axes):
@@ -91,29 +212,74 @@ class Controller:
 
     # calculate sticks movement with deadzone
     def calculate_sticks(self):
-        leftStick = self.control_deadzone(self.deadzone, self.joystick.get_axis(0), self.joystick.get_axis(1))
-        rightStick = self.control_deadzone(self.deadzone, self.joystick.get_axis(2), self.joystick.get_axis(3))
+        leftStick = self.control_deadzone(self.deadzone, self.axes[0], self.axes[1])
+        rightStick = self.control_deadzone(self.deadzone, self.axes[2], self.axes[3])
         self.leftStick.x = leftStick[0]
         self.leftStick.y = leftStick[1]
         self.rightStick.x = rightStick[0]
         self.rightStick.y = rightStick[1]
 
     def calculate_triggers(self):
-        self.leftTrigger.get_trigger(self.joystick)
-        self.rightTrigger.get_trigger(self.joystick)
+        self.leftTrigger.get_trigger(self.axes[self.leftTrigger.axis])
+        self.rightTrigger.get_trigger(self.axes[self.rightTrigger.axis])
 
-    # update the sticks
-    def update(self):
+    # turns the sticks and triggers into actions once per tick and takes the snapshot
+    def poll(self):
         self.calculate_sticks()
-        self.calculate_triggers()    
-class Keyboard:
+        self.calculate_triggers()
+        self.hold("moveRight", self.leftStick.x > 0, self.axisStamps[0])
+        self.hold("moveLeft", self.leftStick.x < 0, self.axisStamps[0])
+        self.hold("moveDown", self.leftStick.y > 0, self.axisStamps[1])
+        self.hold("moveUp", self.leftStick.y < 0, self.axisStamps[1])
+        # a trigger crossing its threshold is stamped with the motion event that moved it there
+        if self.rightTrigger.down:
+            self.press("shoot", self.axisStamps[self.rightTrigger.axis])
+        if self.rightTrigger.up:
+            self.release("shoot", self.axisStamps[self.rightTrigger.axis])
+        return self.take_snapshot()
+
+    # the stick moves the player as far as it is pushed
+    def get_move(self):
+        return self.leftStick.x, self.leftStick.y
+
+class Keyboard(ActionState):
     def __init__(self, controls:Controls):
+        super().__init__()
         self.controls = controls
+        self.bindings = create_bindings(controls)  # key -> action
         self.name = "keyboard"
 
-    def update(self):
+    def handle_event(self, event, stamp=None):
+        if event.type == pygame.KEYDOWN:
+            action = self.bindings.get(event.key)
+            if action is not None:
+                self.press(action, stamp)
+        elif event.type == pygame.KEYUP:
+            action = self.bindings.get(event.key)
+            if action is not None:
+                self.release(action, stamp)
+
+    def poll(self):
+        return self.take_snapshot()
+
+class ReplayInput:
+    """
+    Plays back recorded action snapshots one tick at a time, then holds nothing.
+    """
+    def __init__(self, snapshots, name="replay"):
+        self.snapshots = list(snapshots)
+        self.tick = 0
+        self.name = name
+        self.actions = EMPTY_ACTIONS
+
+    def handle_event(self, event, stamp=None):
         pass
 
+    def poll(self):
+        self.actions = self.snapshots[self.tick] if self.tick < len(self.snapshots) else EMPTY_ACTIONS
+        self.tick += 1
+        return self.actions
+
 # Checks for controllers and initialises them
 def controller_check():
     joysticks = []
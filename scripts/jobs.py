@@ -0,0 +1,54 @@
+# Modules
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+class JobSystem:
+    """
+    A small pool of worker threads for the phases of a tick that do the same independent work for every entity. A phase is split into chunks, the calling thread works on the first chunk while the workers take the rest, and it only returns once every chunk is done, so the next phase never sees half finished work.
+
+    Only work that lets go of the GIL, like NumPy and most pygame calls, actually runs at the same time. Chunk results come back in chunk order, so anything applied from them afterwards happens in the same order at every worker count.
+    """
+    def __init__(self, workers=1, minChunk=64):
+        self.workers = max(1, workers)
+        self.minChunk = minChunk  # the smallest chunk worth handing to another thread
+        self.pool = None
+        if self.workers > 1:
+            self.pool = ThreadPoolExecutor(max_workers=self.workers - 1, thread_name_prefix="job")
+        self.timings = {}  # phase -> seconds spent in it since the last reset
+
+    # splits a range into at most one chunk per worker, none smaller than the minimum
+    def chunks(self, count, minChunk=None):
+        if count <= 0:
+            return []
+        chunkCount = max(1, min(self.workers, count // (minChunk or self.minChunk)))
+        size = -(-count // chunkCount)
+        return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+    # runs kernel(start, stop) over chunks of range(count) and returns their results in chunk order
+    def parallel_for(self, count, kernel, minChunk=None, phase=None):
+        start = time.perf_counter()
+        chunks = self.chunks(count, minChunk)
+        if self.pool is None or len(chunks) < 2:
+            results = [kernel(*chunk) for chunk in chunks]
+        else:
+            futures = [self.pool.submit(kernel, *chunk) for chunk in chunks[1:]]
+            results = [kernel(*chunks[0])]
+            # waits for every chunk, errors in a worker are raised here
+            results.extend(future.result() for future in futures)
+        if phase is not None:
+            self.timings[phase] = self.timings.get(phase, 0) + time.perf_counter() - start
+        return results
+
+    def reset_timings(self):
+        self.timings = {}
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
@@ -0,0 +1,55 @@
+# Modules
+import heapq
+import itertools
+import logging
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+class KineticEvent:
+    def __init__(self, time, kind, callback):
+        self.time = time
+        self.kind = kind
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class KineticQueue:
+    """
+    A time ordered queue of events that are known ahead of time, such as an entity leaving the screen or expiring. Events are fired at the simulation time they were scheduled for instead of being polled every frame.
+    """
+    def __init__(self):
+        self.time = 0
+        self.heap = []
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.heap)
+
+    # schedules a callback to fire after a delay in seconds
+    def schedule(self, delay, callback, kind="event"):
+        event = KineticEvent(self.time + max(0, delay), kind, callback)
+        heapq.heappush(self.heap, (event.time, next(self.counter), event))
+        return event
+
+    # removes every event
+    def clear(self):
+        for _, _, event in self.heap:
+            event.cancel()
+        self.heap = []
+
+    # advances the simulation time and fires every event that is due, in time order
+    def advance(self, dt, *args):
+        self.time += dt
+        fired = 0
+        while self.heap and self.heap[0][0] <= self.time:
+            _, _, event = heapq.heappop(self.heap)
+            if not event.cancelled:
+                event.cancelled = True
+                event.callback(*args)
+                fired += 1
+        return fired
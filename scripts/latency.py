@@ -0,0 +1,83 @@
+# Modules
+import time
+import logging
+from collections import deque
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+# the stages an input goes through on its way to the display
+STAGES = ("wait", "simulate", "render", "present")
+
+# the value below which a share of the sorted values fall
+def percentile(values, share):
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+class LatencySample:
+    __slots__ = ("action", "readTime", "wait", "captured")
+
+    def __init__(self, action, readTime, wait):
+        self.action = action
+        self.readTime = readTime
+        self.wait = wait  # the most the event can have waited in the queue before it was read
+        self.captured = None
+
+class LatencyTracker:
+    """
+    Follows input events from the moment they are read, through the action that consumes them, to the present of the first frame that shows the result.
+
+    Each sample is split into stages. The wait is the time since the events before were read, the most an event can have sat in the queue, since SDL does not say when it arrived. Simulate runs from reading to capturing the frame, render from capturing to flipping, which includes any time queued for the render thread, and present is the flip itself. The total is measured from reading, so it does not include the wait.
+    """
+    def __init__(self, sampleSize=2000):
+        self.lastRead = None
+        self.pending = []  # samples consumed this tick, waiting for their frame to be captured
+        self.samples = deque(maxlen=sampleSize)  # (action, total, wait, simulate, render, present)
+
+    # stamps the events about to be read
+    def read(self):
+        now = time.perf_counter()
+        wait = now - self.lastRead if self.lastRead is not None else 0
+        self.lastRead = now
+        return now, wait
+
+    # starts a sample for every stamped action a player acted on this tick
+    def consume(self, actions):
+        for action, (readTime, wait) in actions.stamps.items():
+            self.pending.append(LatencySample(action, readTime, wait))
+
+    # hands over the samples that the frame being captured shows
+    def capture(self):
+        samples = self.pending
+        self.pending = []
+        now = time.perf_counter()
+        for sample in samples:
+            sample.captured = now
+        return samples
+
+    # finishes the samples of a frame once it has been flipped
+    def presented(self, samples, flipStart, flipEnd):
+        for sample in samples:
+            self.samples.append((sample.action, flipEnd - sample.readTime, sample.wait, sample.captured - sample.readTime, flipStart - sample.captured, flipEnd - flipStart))
+
+    # latency percentiles in seconds, for the total and each stage
+    def report(self, shares=(0.5, 0.9, 0.99)):
+        samples = list(self.samples)
+        columns = {"total": sorted(sample[1] for sample in samples)}
+        for index, stage in enumerate(STAGES):
+            columns[stage] = sorted(sample[index + 2] for sample in samples)
+        return {name: {share: percentile(values, share) for share in shares} for name, values in columns.items()}
+
+    def summary(self):
+        if not self.samples:
+            return "no input latency samples"
+        report = self.report()
+        parts = [f"{name} " + "/".join(f"{value * 1000:.1f}" for value in values.values()) for name, values in report.items()]
+        return f"input latency over {len(self.samples)} inputs, p50/p90/p99 ms: " + ", ".join(parts)
+
+    def reset(self):
+        self.pending = []
+        self.samples.clear()
@@ -1,4 +1,5 @@
 import pygame
+import time
 from pygame.constants import *
 
 class Element():
@@ -68,6 +69,7 @@ class AnimatedElement(Element):
         self.rotation = 0
         self.flip = False
         self.fitToSize = True
+        self.rendered = (None, None)  # (what the last image was made from, the image)
 
         # animation
         self.action: str = ""
@@ -84,6 +86,10 @@ class AnimatedElement(Element):
     @property
     def image(self):
         image = self.animation.img()
+        # the frame only needs scaling again when it or how it is fitted changes
+        key = (image, tuple(self.size), self.fitToSize, self.flip, self.rotation)
+        if self.rendered[0] == key:
+            return self.rendered[1]
         if not self.fitToSize:
             image = pygame.transform.scale(image, self.size)
         else:
@@ -116,6 +122,7 @@ class AnimatedElement(Element):
             image = centered_image
 
         image = pygame.transform.rotate(pygame.transform.flip(image, self.flip, False), self.rotation).convert_alpha()
+        self.rendered = (key, image)
 
         return image
 
@@ -127,14 +134,7 @@ class AnimatedElement(Element):
     def set_action(self, action, override=False):
         if action != self.action or override:
             self.action = action
-            self.animation = self.assets[self.tag + "/" + self.action].copy()
-
-    # updates the current frame of an animation
-    def update_animation(self, dt):
-        self.animation.update(dt)
-
-    def update(self, dt):
-        self.update_animation(dt)
+            self.animation = self.assets[self.tag + "/" + self.action].play()
 
 class TextElement(Element):
     def __init__(self, transform, text, font, colour=(255, 255, 255)):
@@ -142,12 +142,18 @@ class TextElement(Element):
         self.text = text
         self.font = font
         self.colour = colour
+        self.rendered = (None, None)  # (the text, font and colour last rendered, the render)
 
     @property
     def image(self):
+         # the text is only rendered again once it, its font or its colour changes
+         key = (self.text, self.font, self.colour)
+         if self.rendered[0] == key:
+             return self.rendered[1]
          font = self.font.render(self.text, False, self.colour)
          font.convert_alpha()
          self.size = (font.get_width(), font.get_height())
+         self.rendered = (key, font)
          return font
     
     def center_text_x(self, screenSize):
@@ -210,6 +216,10 @@ class UserInterface():
         self.elements = []
         self.surface = pygame.Surface(self.size, pygame.SRCALPHA | pygame.HWSURFACE)
         self.hoveredElements = []
+        self.cursor = None
+        self.refreshInterval = 0  # seconds between redraws, 0 redraws every frame
+        self.lastRefresh = None
+        self.drawnRects = []  # the areas of the surface the last redraw drew to
 
     def add(self, *elements):
         for element in elements:
@@ -223,9 +233,18 @@ class UserInterface():
         for element in elements:
             self.elements.remove(element)
 
+    # only changes the system cursor when it is different, headless displays have no cursors
+    def set_cursor(self, cursor):
+        if cursor != self.cursor:
+            self.cursor = cursor
+            try:
+                pygame.mouse.set_cursor(cursor)
+            except pygame.error:
+                pass
+
     def update(self, dt, camera):
         if self.hoveredElements == []:
-            pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_ARROW)
+            self.set_cursor(pygame.SYSTEM_CURSOR_ARROW)
         mx, my = pygame.mouse.get_pos()[0] // camera.scale, pygame.mouse.get_pos()[1] // camera.scale
         for element in self.elements:
             element.update(dt)
@@ -234,7 +253,7 @@ class UserInterface():
                 if mx > element.transform.x and mx < element.transform.x + element.size[0]:
                     if my < element.transform.y + element.size[1] and my > element.transform.y:
                         pygame.mouse.set_visible(True)
-                        pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_HAND)
+                        self.set_cursor(pygame.SYSTEM_CURSOR_HAND)
                     
                         if element not in self.hoveredElements:
                             self.hoveredElements.append(element)
@@ -242,8 +261,17 @@ class UserInterface():
                         if element in self.hoveredElements:
                             self.hoveredElements.remove(element)
 
+    # redraws the surface and returns whether it changed
     def draw(self):
+        # keeps the last drawn surface until the refresh interval has passed
+        now = time.perf_counter()
+        if self.lastRefresh is not None and now - self.lastRefresh < self.refreshInterval:
+            return False
+        self.lastRefresh = now
         self.surface.fill((0, 0, 0, 0))
+        drawnRects = []
         for element in sorted(self.elements, key=lambda element: element.layer):
             if element.visible:
-                self.surface.blit(element.image, (element.transform.x, element.transform.y))
+                drawnRects.append(self.surface.blit(element.image, (element.transform.x, element.transform.y)))
+        self.drawnRects = drawnRects
+        return True
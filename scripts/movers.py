@@ -0,0 +1,183 @@
+# Modules
+import numpy as np
+import logging
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+# calculates how long each mover takes to leave the screen, inf if it never does
+def exit_times(positions, velocities, margins, screenSize):
+    lower = -margins[:, 0:2]
+    upper = np.array(screenSize, dtype=np.float64) + margins[:, 2:4]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        times = np.where(velocities > 0, (upper - positions) / velocities, np.where(velocities < 0, (lower - positions) / velocities, np.inf))
+    # anything already outside leaves straight away
+    outside = np.any((positions < lower) | (positions > upper), axis=1)
+    return np.where(outside, 0, np.maximum(times.min(axis=1), 0))
+
+class MoverStore:
+    """
+    Keeps the positions, velocities, sizes and bounds of straight line movers (asteroids and projectiles) in NumPy arrays. Every mover is advanced in a single step. Since their motion is analytic, the time each one leaves the screen is scheduled on a kinetic queue instead of testing bounds every frame. The sprite objects are only written back to so they can be rendered and collided.
+    """
+    def __init__(self, kinetics, screenSize, capacity=256):
+        self.kinetics = kinetics
+        self.screenSize = screenSize
+        self.capacity = 0
+        self.positions = np.zeros((0, 2), dtype=np.float64)
+        self.previousPositions = np.zeros((0, 2), dtype=np.float64)
+        self.velocities = np.zeros((0, 2), dtype=np.float64)
+        self.sizes = np.zeros((0, 2), dtype=np.float64)
+        self.margins = np.zeros((0, 4), dtype=np.float64)  # left, top, right, bottom
+        self.alive = np.zeros(0, dtype=bool)
+        self.entities = []
+        self.exitEvents = []
+        self.expiryEvents = []
+        self.jobs = None  # splits the integration over worker threads when set
+        self.slots = {}
+        self.freeSlots = []
+        self.grow(capacity)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, entity):
+        return entity in self.slots
+
+    # grows every array so that more movers can be stored
+    def grow(self, capacity):
+        extra = capacity - self.capacity
+        if extra <= 0:
+            return
+        self.positions = np.concatenate((self.positions, np.zeros((extra, 2))))
+        self.previousPositions = np.concatenate((self.previousPositions, np.zeros((extra, 2))))
+        self.velocities = np.concatenate((self.velocities, np.zeros((extra, 2))))
+        self.sizes = np.concatenate((self.sizes, np.zeros((extra, 2))))
+        self.margins = np.concatenate((self.margins, np.zeros((extra, 4))))
+        self.alive = np.concatenate((self.alive, np.zeros(extra, dtype=bool)))
+        self.entities.extend([None] * extra)
+        self.exitEvents.extend([None] * extra)
+        self.expiryEvents.extend([None] * extra)
+        self.freeSlots.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    # adds an entity, margins are how far past each screen edge it can travel before it exits
+    def add(self, entity, velocity, margins=(25, 25, 25, 25), lifetime=None):
+        if entity in self.slots:
+            self.remove(entity)
+        if not self.freeSlots:
+            self.grow(self.capacity * 2)
+
+        slot = self.freeSlots.pop()
+        self.positions[slot] = entity.transform.x, entity.transform.y
+        self.previousPositions[slot] = self.positions[slot]
+        self.velocities[slot] = velocity[0], velocity[1]
+        self.sizes[slot] = entity.size[0], entity.size[1]
+        self.margins[slot] = margins
+        self.alive[slot] = True
+        self.entities[slot] = entity
+        self.slots[entity] = slot
+        self.schedule_exit(slot)
+        if lifetime is not None:
+            self.expiryEvents[slot] = self.kinetics.schedule(lifetime, entity.expire, "expiry")
+        return slot
+
+    # schedules the moment a mover leaves the screen from its current position and velocity
+    def schedule_exit(self, slot):
+        if self.exitEvents[slot]:
+            self.exitEvents[slot].cancel()
+            self.exitEvents[slot] = None
+        time = exit_times(self.positions[slot:slot+1], self.velocities[slot:slot+1], self.margins[slot:slot+1], self.screenSize)[0]
+        if time != np.inf:
+            self.exitEvents[slot] = self.kinetics.schedule(time, self.entities[slot].exit_bounds, "exit")
+
+    # reschedules every exit when the screen changes size
+    def resize(self, screenSize):
+        self.screenSize = screenSize
+        slots = np.flatnonzero(self.alive)
+        times = exit_times(self.positions[slots], self.velocities[slots], self.margins[slots], screenSize)
+        for slot, time in zip(slots.tolist(), times.tolist()):
+            if self.exitEvents[slot]:
+                self.exitEvents[slot].cancel()
+                self.exitEvents[slot] = None
+            if time != np.inf:
+                self.exitEvents[slot] = self.kinetics.schedule(time, self.entities[slot].exit_bounds, "exit")
+
+    # removes an entity and frees its slot
+    def remove(self, entity):
+        slot = self.slots.pop(entity, None)
+        if slot is None:
+            return
+        self.alive[slot] = False
+        self.velocities[slot] = 0, 0
+        self.entities[slot] = None
+        for events in (self.exitEvents, self.expiryEvents):
+            if events[slot]:
+                events[slot].cancel()
+                events[slot] = None
+        self.freeSlots.append(slot)
+
+    # removes every entity
+    def clear(self):
+        for entity in list(self.slots):
+            entity.mover = None
+        for event in self.exitEvents + self.expiryEvents:
+            if event:
+                event.cancel()
+        self.alive[:] = False
+        self.velocities[:] = 0
+        self.entities = [None] * self.capacity
+        self.exitEvents = [None] * self.capacity
+        self.expiryEvents = [None] * self.capacity
+        self.slots = {}
+        self.freeSlots = list(range(self.capacity - 1, -1, -1))
+
+    def set_velocity(self, entity, velocity):
+        slot = self.slots.get(entity)
+        if slot is not None:
+            self.velocities[slot] = velocity[0], velocity[1]
+            self.schedule_exit(slot)
+
+    def set_position(self, entity, position):
+        slot = self.slots.get(entity)
+        if slot is not None:
+            self.positions[slot] = position[0], position[1]
+            self.schedule_exit(slot)
+
+    def get_velocity(self, entity):
+        slot = self.slots.get(entity)
+        if slot is None:
+            return None
+        return self.velocities[slot]
+
+    # advances every mover, remembering where they were for swept collisions
+    def move(self, dt):
+        def integrate(start, stop):
+            self.previousPositions[start:stop] = self.positions[start:stop]
+            self.positions[start:stop] += self.velocities[start:stop] * dt
+
+        if self.jobs is None:
+            integrate(0, self.capacity)
+        else:
+            # chunks are only worth it once NumPy spends long enough on them to let go of the GIL
+            self.jobs.parallel_for(self.capacity, integrate, minChunk=4096, phase="movers")
+
+    # writes the positions back to the sprites for rendering and collision
+    def sync(self):
+        slots = np.flatnonzero(self.alive)
+        positions = self.positions[slots].tolist()
+        previousPositions = self.previousPositions[slots].tolist()
+        for slot, (x, y), previous in zip(slots.tolist(), positions, previousPositions):
+            entity = self.entities[slot]
+            entity.transform.update(x, y)
+            entity.previousTransform.update(previous)
+            entity.rect.x = x
+            entity.rect.y = y
+
+    # advances and syncs in one step
+    def update(self, dt, screenSize):
+        if screenSize != self.screenSize:
+            self.resize(screenSize)
+        self.move(dt)
+        self.sync()
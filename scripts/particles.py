@@ -23,7 +23,7 @@ class Particle():
     def draw(self, camera):
         camera.draw_circle(self.colour, self.transform, self.radius, layer=self.layer)
 
-        if self.lighting:
+        if self.lighting and QUALITY.lighting:
             lighting = circle_surf(self.lightingRadius, self.lightingCol)
             lighting_transform = self.transform.copy()
             lighting_transform.x -= self.lightingRadius
@@ -42,6 +42,39 @@ class Particle():
             self.lightingRadius = self.timer * 1.5
         
 
+class ParticleQuality:
+    """
+    How many particles every particle system may emit, set by the quality level. Emission is thinned by keeping a share of the particles added, and stops when the particles counted this tick reach the cap.
+    """
+    def __init__(self):
+        self.rate = 1
+        self.cap = float("inf")
+        self.lighting = True
+        self.live = 0
+        self.credit = 0
+
+    def set(self, rate, cap, lighting):
+        self.rate = rate
+        self.cap = cap
+        self.lighting = lighting
+
+    # starts counting the live particles again, once per tick
+    def reset(self):
+        self.live = 0
+
+    # whether a new particle can be emitted
+    def emit(self):
+        if self.live >= self.cap:
+            return False
+        self.credit += self.rate
+        if self.credit < 1:
+            return False
+        self.credit -= 1
+        self.live += 1
+        return True
+
+QUALITY = ParticleQuality()
+
 class ParticleSystem():
     def __init__(self, transform, transformOffset=(0, 0), *args):
         self.transform = transform
@@ -50,7 +83,8 @@ class ParticleSystem():
 
     def add(self, *particles):
         for particle in particles:
-            self.particles.append(particle)
+            if QUALITY.emit():
+                self.particles.append(particle)
 
     def update(self, dt, transform=None):
         for particle in self.particles:
@@ -59,6 +93,7 @@ class ParticleSystem():
         for count, particle in sorted(enumerate(self.particles), reverse=True):
             if particle.remove:
                 self.particles.pop(count)
+        QUALITY.live += len(self.particles)
 
         if transform:
             self.transform = transform + self.transformOffset
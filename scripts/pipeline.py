@@ -0,0 +1,131 @@
+# Modules
+import time
+import queue
+import logging
+import threading
+from collections import deque
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+class RenderPipeline:
+    """
+    Presents the snapshots the simulation captures, in two steps. Composing draws a snapshot into the display surface, and flipping shows it. Unthreaded, both happen as soon as a snapshot is submitted. Threaded, a render thread composes tick N while the simulation runs tick N+1, most of the drawing happens inside pygame calls that let go of the GIL so both can run at once.
+
+    SDL only allows video calls on the thread that made the window, so the flip always happens on the thread that submits. A composed frame waits for the next submit to flip it, and the render thread does not draw into the display again until it has been.
+
+    The snapshots are double buffered, one is being composed while the next waits in a single slot, and the simulation waits when it gets further ahead than that. The time from reading a tick's input to presenting it is recorded either way, so both modes can be compared.
+    """
+    def __init__(self, compose, flip, threaded=False, sampleSize=240):
+        self.compose = compose  # draws a snapshot into the display, on the render thread when threaded
+        self.flip = flip  # shows the composed snapshot, always on the thread that submits
+        self.threaded = threaded
+        self.pending = queue.Queue(maxsize=1)
+        self.composed = queue.Queue(maxsize=1)  # a composed snapshot waiting to be flipped
+        self.thread = None
+        self.error = None
+        self.latencies = deque(maxlen=sampleSize)  # seconds from input to present
+        self.presented = 0
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def averageLatency(self):
+        if not self.latencies:
+            return 0
+        return sum(self.latencies) / len(self.latencies)
+
+    @property
+    def maxLatency(self):
+        return max(self.latencies, default=0)
+
+    def start(self):
+        if self.threaded and self.thread is None:
+            self.error = None
+            self.thread = threading.Thread(target=self.run, name="render", daemon=True)
+            self.thread.start()
+            logger.info("Rendering on a separate thread")
+
+    # hands a snapshot over to be presented, flipping the frame composed before it and waiting while the render thread is a frame behind
+    def submit(self, snapshot):
+        if not self.threaded:
+            self.compose(snapshot)
+            self.flip_snapshot(snapshot)
+            return
+        self.start()
+        self.flip_composed()
+        while True:
+            try:
+                self.pending.put_nowait(snapshot)
+                return
+            except queue.Full:
+                pass
+            # the slot only frees once the frame the render thread is on has been composed and flipped
+            if self.flip_composed(timeout=0.1):
+                try:
+                    self.pending.put(snapshot, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            # a render thread that died would never take the snapshot
+            if not self.running:
+                raise RuntimeError("The render thread stopped") from self.error
+
+    # flips the composed snapshot if there is one, waiting up to a timeout for it
+    def flip_composed(self, timeout=None):
+        try:
+            snapshot = self.composed.get(timeout=timeout) if timeout else self.composed.get_nowait()
+        except queue.Empty:
+            return False
+        try:
+            self.flip_snapshot(snapshot)
+        finally:
+            self.composed.task_done()
+        return True
+
+    def flip_snapshot(self, snapshot):
+        self.flip(snapshot)
+        if snapshot.inputTime is not None:
+            self.latencies.append(time.perf_counter() - snapshot.inputTime)
+        self.presented += 1
+
+    # the render thread, composes snapshots until it is handed None
+    def run(self):
+        while True:
+            snapshot = self.pending.get()
+            try:
+                if snapshot is None:
+                    return
+                self.compose(snapshot)
+                self.composed.put(snapshot)
+                # the display is not drawn into again until this frame has been flipped
+                self.composed.join()
+            except Exception as error:
+                logger.exception("Render thread failed")
+                self.error = error
+                return
+            finally:
+                self.pending.task_done()
+
+    # waits until every submitted snapshot has been composed and flips them
+    def finish(self):
+        while self.running and self.pending.unfinished_tasks:
+            self.flip_composed(timeout=0.01)
+        self.flip_composed()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        if self.running:
+            self.finish()
+            self.pending.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def reset(self):
+        self.latencies.clear()
+        self.presented = 0
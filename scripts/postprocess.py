@@ -0,0 +1,135 @@
+# Modules
+import time
+import logging
+import numpy as np
+import pygame
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+# in the order they are applied
+POST_EFFECTS = ("bloom", "aberration", "flash", "scanlines")
+
+class PostProcessor:
+    """
+    Applies screen effects to the world render target before it is upscaled. The effects work on the pixels of the target in place, through arrays that view its memory instead of copying it, so they only ever touch the low internal resolution and never loop over pixels in Python. Bloom blurs its glow at a quarter of that and leaves stretching it back and adding it on to pygame.
+
+    Which effects run is picked per quality level, aberration and flash only cost anything while the screen is shaking or flashing. The time spent in each effect is added up so its cost per frame can be compared.
+    """
+    def __init__(self, effects=POST_EFFECTS, bloomThreshold=180, bloomStrength=0.6, bloomDownsample=4, scanlineShift=2, aberrationScale=0.1, maxAberration=4, flashColour=(255, 40, 40)):
+        self.effects = ()
+        self.set_effects(effects)
+        self.bloomThreshold = bloomThreshold  # the brightness a pixel needs to glow
+        self.bloomStrength = bloomStrength
+        self.bloomDownsample = bloomDownsample  # the glow is blurred at this fraction of the target size
+        self.scanlineShift = scanlineShift  # every other row loses 1 / 2 ** shift of its brightness
+        self.aberrationScale = aberrationScale  # pixels the colour channels split per unit of screen shake
+        self.maxAberration = maxAberration
+        self.flashColour = np.array(flashColour, dtype=np.uint16)
+        self.glowSurfaces = {}  # target size -> (blurred glow, glow stretched to the target)
+        # cost
+        self.timings = {}  # effect -> seconds spent in it since the last reset
+        self.frames = 0
+
+    # changes the effects that run, keeping them in the order they are applied
+    def set_effects(self, effects):
+        self.effects = tuple(effect for effect in POST_EFFECTS if effect in effects)
+
+    # applies the enabled effects to a surface, shake and flash are the amounts the snapshot captured
+    def apply(self, surface, renderScale=1, shake=0, flash=0):
+        self.frames += 1
+        for effect in self.effects:
+            start = time.perf_counter()
+            match effect:
+                case "bloom":
+                    self.bloom(surface)
+                case "aberration":
+                    self.aberration(surface, round(min(self.maxAberration, shake * self.aberrationScale) * renderScale))
+                case "flash":
+                    self.flash(surface, flash)
+                case "scanlines":
+                    self.scanlines(surface)
+            self.timings[effect] = self.timings.get(effect, 0) + time.perf_counter() - start
+
+    # the surfaces the glow of a target size is blurred in and stretched back to, kept between frames
+    def glow_surfaces(self, size):
+        surfaces = self.glowSurfaces.get(size)
+        if surfaces is None:
+            factor = self.bloomDownsample
+            surfaces = (pygame.Surface((size[0] // factor, size[1] // factor)), pygame.Surface(size))
+            self.glowSurfaces[size] = surfaces
+        return surfaces
+
+    # adds a blurred copy of the brightest pixels back on top
+    def bloom(self, surface):
+        factor = self.bloomDownsample
+        small, glow = self.glow_surfaces(surface.get_size())
+        width, height = small.get_width() * factor, small.get_height() * factor
+        if width == 0 or height == 0:
+            return
+        # the pixel arrays lock the surface, so they are let go of before the glow is blitted
+        area = pygame.surfarray.pixels3d(surface)[:width, :height]
+        # the brightest pixel of every block, less the threshold
+        brightest = np.array(area[::factor, ::factor])
+        for x in range(factor):
+            for y in range(factor):
+                np.maximum(brightest, area[x::factor, y::factor], out=brightest)
+        del area
+        bright = brightest.astype(np.int16)
+        bright -= self.bloomThreshold
+        np.maximum(bright, 0, out=bright)
+        # a 3x3 box blur
+        padded = np.pad(bright, ((1, 1), (1, 1), (0, 0)))
+        blurred = padded[:-2] + padded[1:-1] + padded[2:]
+        blurred = blurred[:, :-2] + blurred[:, 1:-1] + blurred[:, 2:]
+        blurred = blurred * (self.bloomStrength * 255 / (9 * (255 - self.bloomThreshold)))
+        pygame.surfarray.blit_array(small, np.minimum(blurred, 255).astype(np.uint8))
+        # stretching it back up smooths the blocks out, and the add saturates at white
+        pygame.transform.smoothscale(small, glow.get_size(), glow)
+        surface.blit(glow, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+
+    # splits the red and blue channels apart, for screen shake
+    def aberration(self, surface, offset):
+        if offset <= 0 or offset >= surface.get_width():
+            return
+        pixels = pygame.surfarray.pixels3d(surface)
+        pixels[offset:, :, 0] = pixels[:-offset, :, 0]
+        pixels[:-offset, :, 2] = pixels[offset:, :, 2]
+
+    # tints everything towards the flash colour, including the empty parts of the target
+    def flash(self, surface, amount):
+        weight = int(min(1, amount) * 256)
+        if weight <= 0:
+            return
+        # every value of a channel blends to the same result, so each channel is looked up in a table
+        tables = ((np.arange(256, dtype=np.uint16)[:, None] * (256 - weight) + self.flashColour * weight) >> 8).astype(np.uint8)
+        pixels = pygame.surfarray.pixels3d(surface)
+        for channel in range(3):
+            values = pixels[:, :, channel]
+            values[...] = tables[:, channel][values]
+        del pixels
+        if surface.get_flags() & pygame.SRCALPHA:
+            alpha = pygame.surfarray.pixels_alpha(surface)
+            np.maximum(alpha, weight - 1, out=alpha)
+
+    # darkens every other row
+    def scanlines(self, surface):
+        rows = pygame.surfarray.pixels3d(surface)[:, 1::2]
+        rows -= rows >> self.scanlineShift
+
+    # average milliseconds per frame spent in each effect
+    def costs(self):
+        frames = max(1, self.frames)
+        return {effect: seconds / frames * 1000 for effect, seconds in self.timings.items()}
+
+    def summary(self):
+        costs = self.costs()
+        if not costs:
+            return "no post effects applied"
+        return f"post effects over {self.frames} frames, ms per frame: " + ", ".join(f"{effect} {cost:.2f}" for effect, cost in costs.items())
+
+    def reset_timings(self):
+        self.timings = {}
+        self.frames = 0
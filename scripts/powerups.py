@@ -7,14 +7,12 @@ class PowerUp(Entity):
     def __init__(self, transform:tuple[int, int], size:tuple[int, int], tag:str, assets, camLayer=0, isScroll=True, animation="idle"):
         super().__init__(transform, size, tag, assets, camLayer, isScroll, animation)
         self.maxDuration = 20
-        self.currentDuration = 20
         self.isPickedUp = False
 
-    def update_timers(self, dt):
-        if self.isPickedUp:
-            if self.currentDuration < 0:
-                self.kill()
-            elif self.currentDuration > 0:
-                self.currentDuration -= dt
+    # wears off on the wheel it is handed, nothing else gives a power up one
+    def pick_up(self, timers):
+        if not self.isPickedUp:
+            self.isPickedUp = True
             self.hide = True
-    
\ No newline at end of file
+            self.timers = timers
+            self.timers.schedule(self.maxDuration, self.kill)
@@ -4,6 +4,7 @@ from pygame.constants import *
 
 from scripts.entities import PhysicsEntity
 from scripts.particles import Particle, ParticleSystem
+from scripts.archetypes import ArchetypeField
 
 class Weapon():
     def __init__(self, maxMagazine, reloadTime, isAutomatic, shootTime, bullet, muzzleAreas):
@@ -11,19 +12,19 @@ class Weapon():
         self.maxMagazine = maxMagazine
         self.magazine = self.maxMagazine
         self.reloadTime = reloadTime
-        self.currentReloadTime = 0
         self.canReload = True
         self.isReloading = False
         self.isAutomatic = isAutomatic
 
         # time between shots
         self.shootTime = shootTime
-        self.currentShootTime = 0
+        self.shootTimer = None
         self.canShoot = True
         self.shooting = False
 
         self.bullet = bullet
         self.muzzleAreas = muzzleAreas
+        self.timers = None
 
     def copy(self):
         return self.__class__(self.maxMagazine, self.reloadTime, self.isAutomatic, self.shootTime, self.bullet, self.muzzleAreas)
@@ -42,63 +43,65 @@ class Weapon():
                 # create bullet at muzzle transform
                 bullet = self.bullet.copy()
                 bullet.start(muzzle)
+                bullet.timers = game.timers
+                bullet.attach_mover(game.movers, bullet.movement * bullet.speed)
                 # add to world and camera
                 game.projectiles.add(bullet)
                 game.add_to_world(bullet)
 
             # start timer
-            self.currentShootTime = self.shootTime
+            self.start_shot_timer()
             self.magazine -= 1
 
+    # blocks shooting until the time between shots has passed
+    def start_shot_timer(self):
+        self.canShoot = False
+        self.shootTimer = self.timers.schedule(self.shootTime, self.end_shot_timer)
+
+    def end_shot_timer(self):
+        self.canShoot = not self.isReloading
+
     def reload(self):
-        if self.canReload: self.currentReloadTime = self.reloadTime
-
-    def update_timers(self, dt):
-        # reload time
-        if self.currentReloadTime <= 0:
-            if self.canReload == False:#
-                self.magazine = self.maxMagazine
-            self.canReload = True
-            self.isReloading = False
-            self.localRotation = 0
-            # time between shots timer
-            if self.currentShootTime <= 0 and self.currentReloadTime <=0:
-                self.canShoot = True
-            elif self.currentShootTime > 0:
-                self.currentShootTime -= 1 * dt
-                self.canShoot = False
-            else:
-                self.canShoot = False
-        elif self.currentReloadTime > 0:
-            self.currentReloadTime -= 1 * dt
+        if self.canReload:
             self.canReload = False
             self.canShoot = False
             self.isReloading = True
+            self.timers.schedule(self.reloadTime, self.end_reload)
+
+    def end_reload(self):
+        self.magazine = self.maxMagazine
+        self.canReload = True
+        self.isReloading = False
+        self.canShoot = not (self.shootTimer and self.shootTimer.active)
 
     def update(self, game, transform):
-        self.update_timers(game.dt)
         # fully automatic shooting
         if self.shooting: self.shoot(game, transform)    
         if self.magazine < self.maxMagazine: self.canReload == False    
 
 class Projectile(PhysicsEntity):
-    def __init__(self, transform, size, tag, assets, layer=0, isScroll=True, animation="idle"):
-        super().__init__(transform, size, tag, assets, layer, isScroll, animation)
-        self.damage = 25
+    damage = ArchetypeField()
+
+    def __init__(self, transform, archetype, assets, isScroll=True, animation="idle"):
+        super().__init__(transform, archetype.size, archetype.tag, assets, archetype.layer, isScroll, animation, archetype)
         self.movement.y = -1
-        self.speed = 350
         self.hit = False
-        self.set_rotation(-90)
+        self.set_rotation(archetype.rotation)
         self.canDoDamage = True
         self.asteroid = None
         self.particles = ParticleSystem(self.transform)
 
     def copy(self):
-        return self.__class__(self.transform, self.size, self.tag, self.assets, self.camLayer, self.isScroll, self.anim)
+        return self.__class__(self.transform, self.archetype, self.assets, self.isScroll, self.anim)
 
     def start(self, transform):
         self.transform = pygame.math.Vector2(transform)
 
+    # stops the projectile where it is
+    def stop(self):
+        self.movement.y = 0
+        self.set_velocity(self.movement * self.speed)
+
     def check_finished(self):
         if self.hit:
             if self.animation.done:
@@ -108,62 +111,37 @@ class Projectile(PhysicsEntity):
 
     def hit_entity(self, sprite):
         if self.canDoDamage:
-            self.movement.y = 0
+            self.stop()
             self.set_action("hit")
             self.hit = True
             self.canDoDamage = False   
 
-    def check_bounds(self, resolution):
-        if self.transform.y <= -25:
-            self.kill()
-        if self.transform.y >= resolution[1] + 25:
-            self.kill ()
-        if self.transform.x >= resolution[0] + 25:
-            self.kill()
-        if self.transform.x <= -25:
-            self.kill()
-
-    def handle_collision(self, sprite):
-        if sprite.tag == "asteroid":
-            self.hit_entity(sprite)
-            self.asteroid = sprite
-        if sprite.tag == "ufo":
-            self.hit_entity(sprite)
+    def contact_begin(self, other):
+        if other.tag == "asteroid":
+            self.hit_entity(other)
+            self.asteroid = other
+        if other.tag == "ufo":
+            self.hit_entity(other)
 
-        super().handle_collision(sprite)
+    def contact_stay(self, other):
+        self.contact_begin(other)
 
     def update(self, dt, game, particles):
-        self.update_animation(dt)
-        self.move(self.movement * self.speed, [], dt)
-        self.check_collisions(game.asteroids, game.ufos)
         self.check_finished()
-        self.check_bounds(game.window.world.screenSize)
         self.particles.update(dt, self.transform)
         self.particles.draw(game.window.world)
 
 class Missile(Projectile):
-    def __init__(self, transform, size, tag, assets, layer=0, isScroll=True, animation="idle"):
-        super().__init__(transform, size, tag, assets, layer, isScroll, animation)
-        self.damage = 20
-        self.particleOffset = pygame.math.Vector2(6, 10)
-        self.set_rotation(0)
-        self.explosionTimer = 0.5
-        self.currentExplosionTimer = 0
+    particleOffset = ArchetypeField()
+    explosionTimer = ArchetypeField()
 
     def hit_entity(self, sprite):
         if self.canDoDamage:
-            self.movement.y = 0
-            self.currentExplosionTimer = self.explosionTimer
+            self.stop()
+            self.timers.schedule(self.explosionTimer, self.kill)
             self.hit = True
             self.canDoDamage = False
             self.hide = True
-    
-    def update_timers(self, dt, particles):
-        if self.currentExplosionTimer < 0 and self.hit == True:
-            self.kill()
-        if self.currentExplosionTimer > 0 and self.hit == True:
-            self.currentExplosionTimer -= 1 * dt
-            self.explosion_particles(particles)
 
     def explosion_particles(self, particles):
         speedMultiplier = 1.5
@@ -248,16 +226,12 @@ class Missile(Projectile):
     def update(self, dt, game, particles):
         super().update(dt, game, particles)
         self.booster_particles(particles)
-        self.update_timers(dt, particles)
+        if self.hit:
+            self.explosion_particles(particles)
 
 class PiercingProjectile(Projectile):
-    def __init__(self, transform, size, tag, assets, layer=0, isScroll=True, animation="idle"):
-        super().__init__(transform, size, tag, assets, layer, isScroll, animation)
-        self.speed = 400
-        self.damage = 15
-
     def check_finished(self):
-        for entity in self.entityCollisions:
+        for entity in self.contacts:
             if entity.tag == "asteroid":
                 self.asteroid.asteroid_particles(self.transform, self.particles)
 
@@ -265,17 +239,9 @@ class PiercingProjectile(Projectile):
         pass
 
 class SpreadProjectile(Projectile):
-    def __init__(self, transform, size, tag, assets, layer=0, isScroll=True, animation="idle"):
-        super().__init__(transform, size, tag, assets, layer, isScroll, animation)
-        self.set_rotation(0)
-        self.damage = 5
-        self.maxAlive = 0.3
-        self.currentAlive = 0
-        self.hasSpawned = False
-
     def hit_entity(self, sprite):
         if self.canDoDamage:
-            self.movement.y = 0
+            self.stop()
             self.hit = True
             self.canDoDamage = False
 
@@ -285,21 +251,6 @@ class SpreadProjectile(Projectile):
         if self.asteroid:
             self.asteroid.asteroid_particles(self.transform, self.particles)
 
-    def update_timers(self, dt):
-        if self.hasSpawned and self.currentAlive > 0:
-            self.currentAlive -= dt
-        elif self.hasSpawned and self.currentAlive <= 0:
-            self.kill()
-
-    def update(self, dt, game, particles):
-        super().update(dt, game, particles)
-        self.update_timers(dt)
-
-    def start(self, transform):
-        super().start(transform)
-        self.currentAlive = self.maxAlive
-        self.hasSpawned = True
-
 class SpreadWeapon(Weapon):
     def __init__(self, maxMagazine, reloadTime, isAutomatic, shootTime, bullet, muzzleAreas):
         super().__init__(maxMagazine, reloadTime, isAutomatic, shootTime, bullet, muzzleAreas)
@@ -321,13 +272,15 @@ class SpreadWeapon(Weapon):
                     # Adjust bullet direction based on spread angle
                     bullet_direction = pygame.math.Vector2(0, -1).rotate(angle)
                     bullet.movement = bullet_direction
+                    bullet.timers = game.timers
+                    bullet.attach_mover(game.movers, bullet.movement * bullet.speed)
                     
                     # Add to world and camera
                     game.projectiles.add(bullet)
                     game.add_to_world(bullet)
 
             # Start timer
-            self.currentShootTime = self.shootTime
+            self.start_shot_timer()
             self.magazine -= 1
 
     
@@ -335,7 +288,7 @@ class BeamWeapon(Weapon):
     def __init__(self, maxChargingTime, maxMagazine, reloadTime, isAutomatic, shootTime, bullet, muzzleAreas):
         super().__init__(maxMagazine, reloadTime, isAutomatic, shootTime, bullet, muzzleAreas)
         self.maxChargingTime = maxChargingTime
-        self.currentChargingTime = 0
+        self.chargeTimer = None
         self.hasCharged = True
 
     def copy(self):
@@ -343,27 +296,15 @@ class BeamWeapon(Weapon):
 
     def shoot(self, game, transform):
         if not self.shooting:
-            self.currentChargingTime = self.maxChargingTime
             self.hasCharged = False
+            if self.chargeTimer:
+                self.chargeTimer.cancel()
+            self.chargeTimer = self.timers.schedule(self.maxChargingTime, self.end_charge)
             print("hi")
         super().shoot(game, transform)
 
-    def update_timers(self, dt):
-        if self.currentReloadTime <= 0:
-            if self.canReload == False:
-                self.magazine = self.maxMagazine
-                print("reloaded")
-            self.canReload = True
-            self.isReloading = False
-            self.localRotation = 0
-
-            if self.currentChargingTime < 0 and self.shooting:
-                self.hasCharged = True
-                print("charged")
-            elif self.currentChargingTime > 0 and self.shooting:
-                self.currentChargingTime -= dt
-                print("charging")
-        elif self.currentReloadTime > 0:
-            self.currentReloadTime -= dt
-            print("reloading")
+    def end_charge(self):
+        if self.shooting:
+            self.hasCharged = True
+            print("charged")
 
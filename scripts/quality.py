@@ -0,0 +1,122 @@
+# Modules
+import time
+import logging
+from collections import deque
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+class QualityLevel:
+    """
+    One step of the quality ladder, everything the governor is allowed to trade for frame time.
+    """
+    def __init__(self, name, particleRate, particleCap, lighting, renderScale, collisionFidelity, uiRefresh, postEffects):
+        self.name = name
+        self.particleRate = particleRate  # share of emitted particles that are kept
+        self.particleCap = particleCap  # most particles alive at once
+        self.lighting = lighting
+        self.renderScale = renderScale  # share of the full internal resolution the world is rendered at
+        self.collisionFidelity = collisionFidelity
+        self.uiRefresh = uiRefresh  # seconds between redraws of the user interface, 0 redraws every frame
+        self.postEffects = postEffects  # the screen effects applied to the world
+
+# from the best looking to the cheapest
+QUALITY_LEVELS = (
+    QualityLevel("high", 1, 3000, True, 1, "exact", 0, ("bloom", "aberration", "flash", "scanlines")),
+    QualityLevel("medium", 0.6, 1500, True, 1, "exact", 1 / 30, ("aberration", "flash", "scanlines")),
+    QualityLevel("low", 0.35, 600, False, 0.75, "approximate", 1 / 20, ("flash",)),
+    QualityLevel("minimum", 0.15, 250, False, 0.5, "approximate", 1 / 10, ()),
+)
+
+class QualityGovernor:
+    """
+    Watches a rolling window of frame times against the target frame rate and steps the quality level down when frames run long and back up when there is headroom.
+
+    Stepping down needs the average to be well over the target and stepping up needs it to be well under, and each change has to be held for a while before the next. A level that is stepped up to and immediately dropped from waits twice as long before it is tried again.
+    """
+    def __init__(self, targetFPS, levels=QUALITY_LEVELS, level=0, sampleSize=60, downThreshold=1.2, upThreshold=0.75, downDelay=1, upDelay=4, maxUpDelay=60):
+        self.targetFPS = targetFPS
+        self.levels = levels
+        self.level = level
+        self.frameTimes = deque(maxlen=sampleSize)
+        self.downThreshold = downThreshold  # step down when the average frame is this many times the target
+        self.upThreshold = upThreshold  # step up when it is this many times the target
+        self.downDelay = downDelay  # seconds a level is held before stepping down
+        self.upDelay = upDelay  # seconds a level is held before stepping up
+        self.baseUpDelay = upDelay
+        self.maxUpDelay = maxUpDelay
+        self.held = 0
+        self.lastStep = None
+        self.lastFrame = None
+        self.changeAverage = 0  # the average frame time that caused the last change
+        self.onChange = None  # called with the new level
+
+    @property
+    def current(self):
+        return self.levels[self.level]
+
+    @property
+    def targetFrameTime(self):
+        return 1 / self.targetFPS
+
+    @property
+    def averageFrameTime(self):
+        if not self.frameTimes:
+            return 0
+        return sum(self.frameTimes) / len(self.frameTimes)
+
+    # moves to a level and tells whoever applies it
+    def set_level(self, level, reason="manual"):
+        level = max(0, min(len(self.levels) - 1, level))
+        if level == self.level:
+            return
+        previous = self.current
+        # higher levels are cheaper, so a higher level is a step down
+        if level > self.level:
+            # a level that could not be held right after stepping up to it is tried less often
+            if self.lastStep == "up" and self.held < self.upDelay:
+                self.upDelay = min(self.upDelay * 2, self.maxUpDelay)
+            self.lastStep = "down"
+        else:
+            self.lastStep = "up"
+
+        self.level = level
+        self.held = 0
+        self.changeAverage = self.averageFrameTime
+        self.frameTimes.clear()
+        logger.info("Quality %s -> %s (%s), average frame %.2fms against a %.2fms target", previous.name, self.current.name, reason, self.changeAverage * 1000, self.targetFrameTime * 1000)
+        if self.onChange:
+            self.onChange(self.current)
+
+    # adds a frame time and steps the level if the window calls for it
+    def record(self, frameTime):
+        self.frameTimes.append(frameTime)
+        self.held += frameTime
+        # wait for enough frames at this level to judge it
+        if len(self.frameTimes) < self.frameTimes.maxlen:
+            return
+
+        average = sum(self.frameTimes) / len(self.frameTimes)
+        if average > self.targetFrameTime * self.downThreshold and self.held >= self.downDelay:
+            if self.level < len(self.levels) - 1:
+                self.set_level(self.level + 1, "frames over target")
+        elif average < self.targetFrameTime * self.upThreshold and self.held >= self.upDelay:
+            if self.level > 0:
+                self.set_level(self.level - 1, "frames under target")
+            else:
+                self.upDelay = self.baseUpDelay
+
+    # records the time since the last call, once per frame
+    def tick(self):
+        now = time.perf_counter()
+        if self.lastFrame is not None:
+            self.record(now - self.lastFrame)
+        self.lastFrame = now
+
+    # forgets the frame times, for when the game pauses or restarts
+    def reset(self):
+        self.frameTimes.clear()
+        self.lastFrame = None
+        self.held = 0
@@ -0,0 +1,143 @@
+# Modules
+import logging
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+class ModifiedSpriteGroup:
+    """
+    A dense list of entities with O(1) add and remove. Groups made by an entity registry are views over it, so killing an entity only marks it and the registry removes it from every group it is in at the end of the tick.
+    """
+    def __init__(self, registry=None):
+        self.registry = registry
+        self.entities = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __bool__(self):
+        return len(self.entities) > 0
+
+    def __contains__(self, entity):
+        return entity in self.positions
+
+    # iterates over a copy so the group can change while it is looped over, killed entities are skipped until they are removed
+    def __iter__(self):
+        return iter(self.sprites())
+
+    def sprites(self):
+        return [entity for entity in self.entities if not entity.dying]
+
+    def get_entity(self, index):
+        return self.entities[index]
+
+    def has(self, *entities):
+        if not entities:
+            return False
+        return all(entity in self.positions for entity in entities)
+
+    def add(self, *entities):
+        for entity in entities:
+            if entity in self.positions:
+                continue
+            if self.registry is not None:
+                self.registry.register(entity)
+            self.positions[entity] = len(self.entities)
+            self.entities.append(entity)
+            entity.memberships.add(self)
+
+    # swaps the last entity into the removed one's place
+    def remove(self, *entities):
+        for entity in entities:
+            position = self.positions.pop(entity, None)
+            if position is None:
+                continue
+            last = self.entities.pop()
+            if last is not entity:
+                self.entities[position] = last
+                self.positions[last] = position
+            entity.memberships.discard(self)
+
+    def empty(self):
+        for entity in self.entities:
+            entity.memberships.discard(self)
+        self.entities = []
+        self.positions = {}
+
+class EntityRegistry:
+    """
+    Gives every live entity a stable integer id and keeps a dense group per tag. Kills are deferred until the end of the tick, when each killed entity is removed from every group it belongs to.
+    """
+    def __init__(self):
+        self.nextId = 0
+        self.entities = {}  # id -> entity
+        self.groups = {}  # name -> group
+        self.tags = {}  # tag -> group
+        self.pendingKills = []
+
+    # gets a named group, creating it if needed. Unnamed groups are not looked up again
+    def group(self, name=None):
+        if name is None:
+            return ModifiedSpriteGroup(self)
+        if name not in self.groups:
+            self.groups[name] = ModifiedSpriteGroup(self)
+        return self.groups[name]
+
+    # all live entities with a tag
+    def by_tag(self, tag):
+        if tag not in self.tags:
+            self.tags[tag] = ModifiedSpriteGroup()
+        return self.tags[tag]
+
+    def get(self, entityId):
+        return self.entities.get(entityId)
+
+    # the entities of a list that have not been killed this tick
+    @staticmethod
+    def living(entities):
+        return (entity for entity in entities if not entity.dying)
+
+    # gives an entity an id the first time it joins one of the registry's groups
+    def register(self, entity):
+        entity.dying = False
+        if entity.registry is self and entity.entityId in self.entities:
+            return
+        entity.registry = self
+        entity.entityId = self.nextId
+        self.nextId += 1
+        self.entities[entity.entityId] = entity
+        self.by_tag(entity.tag).add(entity)
+
+    # marks an entity to be removed at the end of the tick
+    def kill(self, entity):
+        if not entity.dying:
+            entity.dying = True
+            self.pendingKills.append(entity)
+
+    # removes every killed entity from every group it is in
+    def flush(self):
+        pendingKills = self.pendingKills
+        self.pendingKills = []
+        for entity in pendingKills:
+            # entities added again after being killed stay alive
+            if not entity.dying:
+                continue
+            for group in list(entity.memberships):
+                group.remove(entity)
+            self.entities.pop(entity.entityId, None)
+            entity.dying = False
+        return len(pendingKills)
+
+    # removes every entity from every group
+    def clear(self):
+        for group in list(self.groups.values()) + list(self.tags.values()):
+            group.empty()
+        for entity in self.entities.values():
+            for group in list(entity.memberships):
+                group.remove(entity)
+            entity.dying = False
+        self.entities = {}
+        self.pendingKills = []
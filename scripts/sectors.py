@@ -0,0 +1,99 @@
+# Modules
+import logging
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+class SectorGrid:
+    """
+    Splits the world into square sectors and keeps the ones around the players awake. Entities in awake sectors are simulated fully. Entities in sleeping sectors skip their per-entity updates, collisions and drawing, and only drift along their current movement until a player comes close enough to wake their sector.
+
+    A world that fits on one screen is a single always awake sector, so nothing sleeps unless a larger world is asked for.
+    """
+    def __init__(self, worldSize, screenSize, sectorSize=256, wakeRadius=1):
+        self.sectorSize = sectorSize
+        self.wakeRadius = wakeRadius  # how many sectors past the ones in view stay awake
+        self.worldSize = worldSize
+        self.screenSize = screenSize
+        self.awake = set()
+        self.stats = {"awake": 0, "asleep": 0}
+
+    # sectors only matter when the world is bigger than the screen
+    @property
+    def enabled(self):
+        return self.worldSize[0] > self.screenSize[0] or self.worldSize[1] > self.screenSize[1]
+
+    def get_sector(self, point):
+        return int(point[0] // self.sectorSize), int(point[1] // self.sectorSize)
+
+    def resize(self, worldSize, screenSize):
+        self.worldSize = worldSize
+        self.screenSize = screenSize
+
+    # wakes every sector within the wake radius of the focus rects and lets the rest sleep
+    def wake_around(self, rects):
+        awake = set()
+        # entities only ever leave the world by a margin, so the sectors just past its edges are the last ones needed
+        lastX, lastY = self.get_sector(self.worldSize)
+        for rect in rects:
+            minX, minY = self.get_sector(rect.topleft)
+            maxX, maxY = self.get_sector(rect.bottomright)
+            for x in range(max(-1, minX - self.wakeRadius), min(lastX + 1, maxX + self.wakeRadius) + 1):
+                for y in range(max(-1, minY - self.wakeRadius), min(lastY + 1, maxY + self.wakeRadius) + 1):
+                    awake.add((x, y))
+
+        woken = len(awake - self.awake)
+        if woken and self.awake:
+            logger.debug("Woke %s sectors", woken)
+        self.awake = awake
+
+    def is_awake(self, entity):
+        if not self.enabled:
+            return True
+        return self.get_sector(entity.rect.center) in self.awake
+
+    # splits a group into its awake and sleeping entities
+    def partition(self, group):
+        if not self.enabled:
+            return group.sprites(), []
+        awake = []
+        asleep = []
+        for entity in group:
+            if self.get_sector(entity.rect.center) in self.awake:
+                awake.append(entity)
+            else:
+                asleep.append(entity)
+        return awake, asleep
+
+    # the coarse update of a sleeping entity, it keeps drifting and is removed once it leaves the world, but does nothing else
+    def drift(self, entity, dt):
+        # movers are already advanced and bounds checked in bulk
+        if getattr(entity, "mover", None) is not None:
+            return
+        entity.transform += entity.movement * dt
+        entity.rect.center = entity.transform
+        # the same test an awake entity runs, otherwise anything drifting away from the players would never be killed
+        check_bounds = getattr(entity, "check_bounds", None)
+        if check_bounds is not None:
+            check_bounds(self.worldSize)
+
+    # picks which sectors are awake this tick
+    def update(self, focus):
+        if self.enabled:
+            self.wake_around(focus)
+
+    # partitions every group and drifts the sleeping entities, returning the awake ones per group
+    def simulate(self, dt, *groups):
+        self.stats["awake"] = 0
+        self.stats["asleep"] = 0
+        awakeGroups = []
+        for group in groups:
+            awake, asleep = self.partition(group)
+            for entity in asleep:
+                self.drift(entity, dt)
+            self.stats["awake"] += len(awake)
+            self.stats["asleep"] += len(asleep)
+            awakeGroups.append(awake)
+        return awakeGroups
@@ -13,6 +13,21 @@ class Settings:
     def __init__(self):
         self.resolution = (pygame.display.Info().current_w, pygame.display.Info().current_h)
         self.targetFPS = 120
+        self.adaptiveQuality = True  # lowers the quality level when frames take longer than the target
+        self.qualityLevel = 0  # the level to start at, 0 is the highest
+        self.captureSource = None  # "display" or "world" records every presented frame from the start, F9 toggles it and records the world when this is None
+        self.captureFormat = "png"  # "png" sequence or "raw" stream to an encoder
+        self.captureDirectory = "captures"
+        self.spriteCache = "data/cache"  # where flipped and rotated frames and their masks are kept between runs, None derives them as they are drawn
+        self.pipelined = False  # draws each tick on a render thread while the next one is simulated
+        self.renderScale = None  # share of the full resolution the world is rendered at, None lets the quality level pick
+        self.postEffects = None  # the screen effects applied to the world, None lets the quality level pick and () turns them off
+        self.starfield = True  # draws a layer of stars over the background that scrolls faster than it
+        self.collisionFidelity = "exact"  # "exact" or "approximate"
+        self.worldSize = None  # the size of the playfield, None fits it to one screen
+        self.sectorSize = 256
+        self.sectorWakeRadius = 1  # sectors around the players that stay awake
+        self.jobWorkers = 1  # threads the data parallel phases of a tick are split over, 1 runs them on the game thread
         self.keyboard = Controls(K_d, K_a, K_s, K_w, K_LSHIFT, K_ESCAPE, K_SPACE, K_r, K_e)
         self.controller = Controls(0, 0, 1, 1, 1, 7, 100, 2, 3)
 
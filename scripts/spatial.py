@@ -0,0 +1,208 @@
+# Modules
+import pygame
+import math
+import logging
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+# the area an entity covered this tick, including the path of swept colliders
+def get_bounds(entity):
+    if entity.collider.swept:
+        previous = entity.rect.move(entity.previousTransform.x - entity.transform.x, entity.previousTransform.y - entity.transform.y)
+        return entity.rect.union(previous)
+    return entity.rect
+
+# the radius used when an entity is treated as a circle
+def get_radius(entity):
+    if entity.collider.shape == "circle":
+        return entity.collider.radius
+    return min(entity.size) / 2
+
+# the distance along a ray to where it enters a circle, None if it misses
+def ray_circle(origin, direction, center, radius):
+    toCenter = pygame.math.Vector2(center) - origin
+    along = toCenter.dot(direction)
+    distanceSquared = toCenter.length_squared() - along * along
+    if distanceSquared > radius * radius:
+        return None
+    offset = math.sqrt(radius * radius - distanceSquared)
+    if along + offset < 0:
+        return None
+    return max(0, along - offset)
+
+# the distance along a ray to where it enters a rect, None if it misses
+def ray_rect(origin, direction, rect):
+    near, far = 0, math.inf
+    for axis, (low, high) in enumerate(((rect.left, rect.right), (rect.top, rect.bottom))):
+        if direction[axis] == 0:
+            if not low <= origin[axis] <= high:
+                return None
+            continue
+        t1 = (low - origin[axis]) / direction[axis]
+        t2 = (high - origin[axis]) / direction[axis]
+        near = max(near, min(t1, t2))
+        far = min(far, max(t1, t2))
+    if near > far:
+        return None
+    return near
+
+class SpatialGrid:
+    """
+    A uniform grid of the live entities, rebuilt once per tick. Answers nearest, radius and raycast queries by only visiting the cells around the query instead of every entity.
+    """
+    def __init__(self, cellSize=48):
+        self.cellSize = cellSize
+        self.cells = {}  # tag -> {cell: [entities]}
+        self.entities = {}  # tag -> [entities]
+        self.extents = {}  # tag -> (minX, minY, maxX, maxY) of occupied cells
+
+    def get_cell(self, point):
+        return int(point[0] // self.cellSize), int(point[1] // self.cellSize)
+
+    # every cell a rect touches
+    def get_cells(self, rect):
+        minX, minY = self.get_cell(rect.topleft)
+        maxX, maxY = self.get_cell(rect.bottomright)
+        for x in range(minX, maxX + 1):
+            for y in range(minY, maxY + 1):
+                yield x, y
+
+    # clears the grid and inserts every entity of the groups
+    def rebuild(self, *groups):
+        self.cells = {}
+        self.entities = {}
+        self.extents = {}
+        for group in groups:
+            for entity in group:
+                self.insert(entity)
+
+    def insert(self, entity):
+        cells = self.cells.setdefault(entity.tag, {})
+        self.entities.setdefault(entity.tag, []).append(entity)
+        bounds = get_bounds(entity)
+        for cell in self.get_cells(bounds):
+            cells.setdefault(cell, []).append(entity)
+
+        minX, minY = self.get_cell(bounds.topleft)
+        maxX, maxY = self.get_cell(bounds.bottomright)
+        if entity.tag in self.extents:
+            extent = self.extents[entity.tag]
+            minX, minY, maxX, maxY = min(minX, extent[0]), min(minY, extent[1]), max(maxX, extent[2]), max(maxY, extent[3])
+        self.extents[entity.tag] = (minX, minY, maxX, maxY)
+
+    # entities of a tag whose bounds may overlap a rect
+    def query_rect(self, tag, rect):
+        cells = self.cells.get(tag)
+        if not cells:
+            return []
+        found = []
+        seen = set()
+        for cell in self.get_cells(rect):
+            for entity in cells.get(cell, ()):
+                if entity not in seen:
+                    seen.add(entity)
+                    found.append(entity)
+        return found
+
+    # the entity of a tag whose center is closest to a point
+    def nearest(self, tag, point, maxDistance=math.inf):
+        cells = self.cells.get(tag)
+        if not cells:
+            return None
+        point = pygame.math.Vector2(point)
+        centerX, centerY = self.get_cell(point)
+        minX, minY, maxX, maxY = self.extents[tag]
+        maxRing = max(centerX - minX, maxX - centerX, centerY - minY, maxY - centerY)
+
+        best = None
+        bestDistance = maxDistance
+        ring = 0
+        while ring <= maxRing:
+            for x in range(centerX - ring, centerX + ring + 1):
+                for y in range(centerY - ring, centerY + ring + 1):
+                    # only the outline of the ring, the inside has been searched already
+                    if ring and centerX - ring < x < centerX + ring and centerY - ring < y < centerY + ring:
+                        continue
+                    for entity in cells.get((x, y), ()):
+                        distance = point.distance_to(entity.rect.center)
+                        if distance < bestDistance:
+                            best = entity
+                            bestDistance = distance
+            # every cell left is at least this far away
+            if bestDistance <= ring * self.cellSize:
+                break
+            ring += 1
+        return best
+
+    # every entity of a tag whose circle is within a radius of a point
+    def within_radius(self, tag, point, radius):
+        point = pygame.math.Vector2(point)
+        area = pygame.Rect(point.x - radius, point.y - radius, radius * 2, radius * 2)
+        found = []
+        for entity in self.query_rect(tag, area):
+            if point.distance_to(entity.rect.center) <= radius + get_radius(entity):
+                found.append(entity)
+        return found
+
+    # the first entity a ray hits and how far along the ray it is, walking the cells the ray passes through
+    def raycast(self, origin, direction, maxDistance, tags=None):
+        origin = pygame.math.Vector2(origin)
+        direction = pygame.math.Vector2(direction)
+        if direction.length_squared() == 0:
+            return None
+        direction = direction.normalize()
+        tags = [tag for tag in (tags if tags is not None else self.cells) if tag in self.extents]
+        if not tags:
+            return None
+
+        # nothing can be hit past the farthest occupied cell
+        minX = min(self.extents[tag][0] for tag in tags) * self.cellSize
+        minY = min(self.extents[tag][1] for tag in tags) * self.cellSize
+        maxX = (max(self.extents[tag][2] for tag in tags) + 1) * self.cellSize
+        maxY = (max(self.extents[tag][3] for tag in tags) + 1) * self.cellSize
+        farthest = max(origin.distance_to(corner) for corner in ((minX, minY), (minX, maxY), (maxX, minY), (maxX, maxY)))
+        maxDistance = min(maxDistance, farthest)
+
+        cellX, cellY = self.get_cell(origin)
+        stepX = 1 if direction.x > 0 else -1
+        stepY = 1 if direction.y > 0 else -1
+        nextX = (cellX + (stepX > 0)) * self.cellSize
+        nextY = (cellY + (stepY > 0)) * self.cellSize
+        tMaxX = (nextX - origin.x) / direction.x if direction.x else math.inf
+        tMaxY = (nextY - origin.y) / direction.y if direction.y else math.inf
+        tDeltaX = self.cellSize / abs(direction.x) if direction.x else math.inf
+        tDeltaY = self.cellSize / abs(direction.y) if direction.y else math.inf
+
+        best = None
+        bestDistance = maxDistance
+        seen = set()
+        travelled = 0
+        while travelled <= bestDistance:
+            for tag in tags:
+                for entity in self.cells.get(tag, {}).get((cellX, cellY), ()):
+                    if entity in seen:
+                        continue
+                    seen.add(entity)
+                    if entity.collider.shape == "circle":
+                        distance = ray_circle(origin, direction, entity.rect.center, entity.collider.radius)
+                    else:
+                        distance = ray_rect(origin, direction, entity.rect)
+                    if distance is not None and distance <= bestDistance:
+                        best = entity
+                        bestDistance = distance
+            # step into the next cell along the ray
+            if tMaxX < tMaxY:
+                travelled = tMaxX
+                tMaxX += tDeltaX
+                cellX += stepX
+            else:
+                travelled = tMaxY
+                tMaxY += tDeltaY
+                cellY += stepY
+
+        if best is None:
+            return None
+        return best, bestDistance
@@ -0,0 +1,238 @@
+# Modules
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import numpy as np
+import pygame
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+# bumped whenever what is derived, or how it is laid out on disk, changes
+CACHE_VERSION = 1
+
+# every frame is stored flipped and unflipped at each quarter turn, the only angles that rotate without resampling
+QUARTER_TURNS = 4
+VARIANTS = QUARTER_TURNS * 2
+
+# a pixel is solid in a mask when its alpha is above this, the same as pygame.mask.from_surface
+MASK_THRESHOLD = 127
+
+# a content hash of every image under the asset directory and the animation data they are played with
+def asset_hash(basePath, dataPath):
+    digest = hashlib.sha256(f"sprite cache {CACHE_VERSION}".encode())
+    paths = []
+    for root, dirs, files in os.walk(basePath):
+        for name in files:
+            paths.append(os.path.join(root, name))
+    for path in sorted(paths, key=lambda path: os.path.relpath(path, basePath).replace("\\", "/")) + [dataPath]:
+        digest.update(os.path.relpath(path, basePath).replace("\\", "/").encode())
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+# the index of the variant for a rotation and flip, or None when the rotation is not a quarter turn
+def variant_index(rotation, flip):
+    if rotation % 90:
+        return None
+    return int(rotation // 90) % QUARTER_TURNS * 2 + bool(flip)
+
+class SpriteVariants:
+    """
+    The derived data of one animation, a view over the rows of the cache that belong to it.
+    """
+    __slots__ = ("cache", "first", "frames")
+
+    def __init__(self, cache, first, frames):
+        self.cache = cache
+        self.first = first  # the row of the first variant of the first frame
+        self.frames = frames
+
+    def row(self, frame, rotation, flip):
+        variant = variant_index(rotation, flip)
+        if variant is None:
+            return None
+        return self.first + frame * VARIANTS + variant
+
+    # the frame flipped and then rotated, or None when the rotation is not cached
+    def image(self, frame, rotation=0, flip=False):
+        row = self.row(frame, rotation, flip)
+        return None if row is None else self.cache.image(row)
+
+    def mask(self, frame, rotation=0, flip=False):
+        row = self.row(frame, rotation, flip)
+        return None if row is None else self.cache.mask(row)
+
+    # the rect around the solid pixels and the radius of the circle around them from the middle of the image
+    def bounds(self, frame, rotation=0, flip=False):
+        row = self.row(frame, rotation, flip)
+        return None if row is None else self.cache.bounds(row)
+
+class SpriteCache:
+    """
+    Sprite data derived from the animation frames, stored on disk so it is worked out once per set of assets instead of once per process. Every frame is kept flipped and unflipped at each quarter turn, with its collision mask and the shape around its solid pixels.
+
+    The cache lives in a directory named after a hash of the source images and animation data, so changing either one builds a new cache and the old one is removed. Pixels and masks are flat arrays that are memory mapped read only, so any number of processes can share one copy through the page cache. Surfaces and masks are only made from them when they are first asked for, and are then kept for the life of the process.
+    """
+    def __init__(self, directory, index, pixels, masks, table, bounds):
+        self.directory = directory
+        self.index = index  # animation name -> (first row, frames)
+        self.pixels = pixels  # RGBA bytes of every variant back to back
+        self.masks = masks  # mask bits of every variant, each row of pixels packed into whole bytes
+        self.table = table  # row -> (pixel offset, width, height, mask offset)
+        self.boundsTable = bounds  # row -> (x, y, width, height, radius)
+        self.images = {}  # row -> surface
+        self.maskCache = {}  # row -> pygame mask
+
+    @property
+    def rows(self):
+        return len(self.table)
+
+    # the view over the rows of one animation
+    def variants(self, name):
+        entry = self.index.get(name)
+        if entry is None:
+            return None
+        return SpriteVariants(self, *entry)
+
+    # gives every animation it has rows for a view over them
+    def attach(self, assets):
+        for name, animation in assets.items():
+            animation.variants = self.variants(name)
+
+    def image(self, row):
+        image = self.images.get(row)
+        if image is None:
+            offset, width, height, _ = self.table[row]
+            # the surface reads straight from the mapped file until it is converted
+            image = pygame.image.frombuffer(self.pixels[offset:offset + width * height * 4], (int(width), int(height)), "RGBA")
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+            self.images[row] = image
+        return image
+
+    def mask(self, row):
+        mask = self.maskCache.get(row)
+        if mask is None:
+            _, width, height, offset = self.table[row]
+            width, height = int(width), int(height)
+            rowBytes = (width + 7) // 8
+            bits = np.unpackbits(self.masks[offset:offset + rowBytes * height].reshape(height, rowBytes), axis=1, count=width)
+            # an 8 bit surface keyed on 0 masks in exactly the solid pixels
+            solid = pygame.image.frombuffer(bits.tobytes(), (width, height), "P")
+            solid.set_colorkey(0)
+            mask = pygame.mask.from_surface(solid)
+            self.maskCache[row] = mask
+        return mask
+
+    def bounds(self, row):
+        x, y, width, height, radius = self.boundsTable[row]
+        return pygame.Rect(int(x), int(y), int(width), int(height)), float(radius)
+
+    # derives the data for a set of loaded animations
+    @classmethod
+    def build(cls, assets, directory=None):
+        index = {}
+        pixels, masks, table, bounds = [], [], [], []
+        pixelOffset = maskOffset = 0
+        for name in sorted(assets):
+            images = assets[name].images
+            index[name] = (len(table), len(images))
+            for frame in images:
+                for turn in range(QUARTER_TURNS):
+                    for flip in (False, True):
+                        image = pygame.transform.rotate(pygame.transform.flip(frame, flip, False), turn * 90)
+                        width, height = image.get_size()
+                        rgba = np.frombuffer(pygame.image.tobytes(image, "RGBA"), dtype=np.uint8)
+                        solid = rgba[3::4].reshape(height, width) > MASK_THRESHOLD
+                        packed = np.packbits(solid, axis=1).ravel()
+                        pixels.append(rgba)
+                        masks.append(packed)
+                        table.append((pixelOffset, width, height, maskOffset))
+                        bounds.append(cls.solid_bounds(solid))
+                        pixelOffset += rgba.size
+                        maskOffset += packed.size
+        pixels = np.concatenate(pixels) if pixels else np.zeros(0, dtype=np.uint8)
+        masks = np.concatenate(masks) if masks else np.zeros(0, dtype=np.uint8)
+        return cls(directory, index, pixels, masks, np.array(table, dtype=np.int64).reshape(-1, 4), np.array(bounds, dtype=np.float32).reshape(-1, 5))
+
+    # the rect around the solid pixels of a mask and the radius of the circle that holds them, centred on the image
+    @staticmethod
+    def solid_bounds(solid):
+        height, width = solid.shape
+        rows = np.flatnonzero(solid.any(axis=1))
+        columns = np.flatnonzero(solid.any(axis=0))
+        if not len(rows):
+            return (0, 0, 0, 0, 0)
+        top, bottom = rows[0], rows[-1] + 1
+        left, right = columns[0], columns[-1] + 1
+        # the furthest corner of a solid pixel from the middle
+        ys, xs = np.nonzero(solid)
+        dx = np.maximum(np.abs(xs - width / 2), np.abs(xs + 1 - width / 2))
+        dy = np.maximum(np.abs(ys - height / 2), np.abs(ys + 1 - height / 2))
+        radius = float(np.sqrt((dx * dx + dy * dy).max()))
+        return (left, top, right - left, bottom - top, radius)
+
+    # writes the cache to its directory, building it beside it first so readers never see half of it
+    def save(self, directory):
+        parent = os.path.dirname(directory)
+        os.makedirs(parent, exist_ok=True)
+        building = tempfile.mkdtemp(prefix=".building-", dir=parent)
+        try:
+            np.save(os.path.join(building, "pixels.npy"), self.pixels)
+            np.save(os.path.join(building, "masks.npy"), self.masks)
+            np.save(os.path.join(building, "table.npy"), self.table)
+            np.save(os.path.join(building, "bounds.npy"), self.boundsTable)
+            with open(os.path.join(building, "index.json"), "w") as file:
+                json.dump({"version": CACHE_VERSION, "animations": self.index}, file)
+            os.replace(building, directory)
+        except OSError:
+            # another process finished the same cache first
+            shutil.rmtree(building, ignore_errors=True)
+            if not os.path.isdir(directory):
+                raise
+        self.directory = directory
+
+    # maps a saved cache, None when it is missing or was written by another version
+    @classmethod
+    def open(cls, directory):
+        try:
+            with open(os.path.join(directory, "index.json")) as file:
+                index = json.load(file)
+            if index.get("version") != CACHE_VERSION:
+                return None
+            arrays = [np.load(os.path.join(directory, name), mmap_mode="r") for name in ("pixels.npy", "masks.npy", "table.npy", "bounds.npy")]
+        except (OSError, ValueError):
+            return None
+        return cls(directory, {name: tuple(entry) for name, entry in index["animations"].items()}, *arrays)
+
+    # opens the cache for the current assets, building and saving it when there is none
+    @classmethod
+    def load(cls, assets, basePath, dataPath, directory):
+        key = asset_hash(basePath, dataPath)
+        path = os.path.join(directory, f"sprites-{key[:24]}")
+        cache = cls.open(path)
+        if cache is not None:
+            logger.info("Sprite cache loaded from %s", path)
+            return cache
+        cache = cls.build(assets)
+        try:
+            cache.save(path)
+            cls.prune(directory, keep=path)
+            logger.info("Sprite cache of %s frames built in %s", cache.rows, path)
+        except OSError:
+            logger.warning("Could not save the sprite cache to %s, using it from memory", path, exc_info=True)
+        return cache
+
+    # removes caches built for assets that have since changed
+    @staticmethod
+    def prune(directory, keep):
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith("sprites-") and path != keep:
+                shutil.rmtree(path, ignore_errors=True)
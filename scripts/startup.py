@@ -0,0 +1,33 @@
+# Modules
+import time
+import logging
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+class StartupTimeline:
+    """
+    Times the steps of starting the game. Each mark ends a step that began at the mark before it, so the steps add up to the time since the timeline was made.
+    """
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.last = self.start
+        self.stages = []  # (name, seconds since the start when it began, seconds it took)
+
+    # ends the step that has been running since the last mark
+    def mark(self, name):
+        now = time.perf_counter()
+        self.stages.append((name, self.last - self.start, now - self.last))
+        self.last = now
+
+    @property
+    def total(self):
+        return self.last - self.start
+
+    def report(self):
+        lines = [f"startup took {self.total * 1000:.1f}ms"]
+        for name, began, took in self.stages:
+            lines.append(f"  {began * 1000:8.1f}ms  {took * 1000:8.1f}ms  {name}")
+        return "\n".join(lines)
@@ -0,0 +1,111 @@
+# Modules
+import math
+import logging
+
+# Scripts
+
+
+logger = logging.getLogger(__name__)
+
+class Timer:
+    def __init__(self, wheel, callback, args):
+        self.wheel = wheel
+        self.callback = callback
+        self.args = args
+        self.expires = 0
+        self.slot = None
+
+    # whether the timer is still waiting to fire
+    @property
+    def active(self):
+        return self.slot is not None
+
+    # seconds left until the timer fires
+    @property
+    def remaining(self):
+        if not self.active:
+            return 0
+        return max(0, self.expires * self.wheel.resolution - self.wheel.time)
+
+    def cancel(self):
+        if self.slot is not None:
+            del self.slot[self]
+            self.slot = None
+
+    # moves the timer so that it fires after a new delay
+    def reschedule(self, delay):
+        self.cancel()
+        self.wheel.insert(self, self.wheel.tick + self.wheel.delay_to_ticks(delay))
+        return self
+
+class TimerWheel:
+    """
+    A hierarchical timer wheel on simulation time. Each level is a ring of slots, the first level holds timers due within one revolution and every level above covers a revolution of the one below. Higher slots are cascaded down as the wheel turns, so advancing only touches the timers that are due.
+    """
+    def __init__(self, resolution=1/120, slotBits=6, levels=4):
+        self.resolution = resolution
+        self.slotBits = slotBits
+        self.numSlots = 1 << slotBits
+        self.mask = self.numSlots - 1
+        self.levels = [[{} for _ in range(self.numSlots)] for _ in range(levels)]
+        self.maxTicks = (1 << (slotBits * levels)) - 1
+        self.tick = 0
+        self.time = 0
+
+    def delay_to_ticks(self, delay):
+        return max(1, math.ceil(delay / self.resolution - 1e-9))
+
+    # schedules a callback to fire after a delay in seconds and returns its handle
+    def schedule(self, delay, callback, *args):
+        timer = Timer(self, callback, args)
+        self.insert(timer, self.tick + self.delay_to_ticks(delay))
+        return timer
+
+    # places a timer in the level and slot its expiry tick falls into
+    def insert(self, timer, expires):
+        timer.expires = expires
+        ticks = min(expires - self.tick, self.maxTicks)
+        level = 0
+        while ticks >= (1 << (self.slotBits * (level + 1))):
+            level += 1
+        slot = self.levels[level][(expires >> (self.slotBits * level)) & self.mask]
+        slot[timer] = None
+        timer.slot = slot
+
+    # moves every timer in a slot of a higher level down to the levels below
+    def cascade(self, level):
+        index = (self.tick >> (self.slotBits * level)) & self.mask
+        slot = self.levels[level][index]
+        timers = list(slot)
+        slot.clear()
+        for timer in timers:
+            self.insert(timer, timer.expires)
+        return index
+
+    # cancels every timer
+    def clear(self):
+        for level in self.levels:
+            for slot in level:
+                for timer in slot:
+                    timer.slot = None
+                slot.clear()
+
+    # advances the simulation time and fires every timer that has expired
+    def advance(self, dt):
+        self.time += dt
+        target = int(self.time / self.resolution)
+        while self.tick < target:
+            self.tick += 1
+            # cascade the higher levels whenever the level below wraps around
+            level = 1
+            while level < len(self.levels) and (self.tick >> (self.slotBits * (level - 1))) & self.mask == 0:
+                if self.cascade(level) != 0:
+                    break
+                level += 1
+
+            slot = self.levels[0][self.tick & self.mask]
+            while slot:
+                timer = next(iter(slot))
+                del slot[timer]
+                timer.slot = None
+                timer.callback(*timer.args)
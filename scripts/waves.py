@@ -5,19 +5,19 @@ import random
 from pygame.constants import *
 
 # Scripts
-from scripts.entities import Asteroid, UFO, ModifiedSpriteGroup
+from scripts.entities import Asteroid, UFO
+from scripts.registry import ModifiedSpriteGroup
+from scripts.events import AsteroidSpawned
 
 logger = logging.getLogger(__name__)
 
-SPAWN_ASTEROID = USEREVENT + 1
-SPAWN_UFO = USEREVENT + 2
-
 # a specific wave
 class Wave:
     def __init__(self, number, numAsteroids, numUFOs):
         self.number = number
         self.numAsteroids = numAsteroids
         self.numUfos = numUFOs
+        # entities waiting to spawn, they join the registry once they are added to the game's groups
         self.asteroids = ModifiedSpriteGroup()
         self.ufos = ModifiedSpriteGroup()
         self.started = False
@@ -29,47 +29,47 @@ class Wave:
         self.numUfos = random.randint(self.numUfos, self.numUfos+5)
 
         for i in range(self.numAsteroids):
-            asteroid = Asteroid((0, 0), (40, 38), "asteroid", game.assets)
+            asteroid = Asteroid((0, 0), game.archetypes["asteroid"], game.assets)
             self.asteroids.add(asteroid)
             
 
         for i in range(self.numUfos):
-            ufo = UFO((0, 0), (24, 19), "ufo", game.assets)
+            ufo = UFO((0, 0), game.archetypes["ufo"], game.assets)
             self.ufos.add(ufo)
 
         self.started = True
         
-        pygame.time.set_timer(SPAWN_ASTEROID, random.randrange(500, 2000))
-        pygame.time.set_timer(SPAWN_UFO, random.randrange(500, 2000))
+        game.timers.schedule(random.randrange(500, 2000) / 1000, self.spawn_asteroid, game)
+        game.timers.schedule(random.randrange(500, 2000) / 1000, self.spawn_ufo, game)
 
+    # spawns the next asteroid and schedules the one after it
     def spawn_asteroid(self, game):
-        stop = False
+        if game.state != "running":
+            return
         for asteroid in self.asteroids:
-            if not asteroid.spawned and not stop:
+            if not asteroid.spawned:
+                asteroid.game = game
                 asteroid.spawn(game.get_world_size(), game.window.world)
+                asteroid.attach_mover(game.movers, asteroid.direction, asteroid.boundsMargins)
                 game.asteroids.add(asteroid)
                 game.add_to_world(asteroid)
-                pygame.time.set_timer(SPAWN_ASTEROID, random.randrange(500, 2000))
-                stop = True
+                game.events.publish(AsteroidSpawned(asteroid))
+                game.timers.schedule(random.randrange(500, 2000) / 1000, self.spawn_asteroid, game)
+                break
 
+    # spawns the next ufo and schedules the one after it
     def spawn_ufo(self, game):
-        stop = False
+        if game.state != "running":
+            return
         for ufo in self.ufos:
-            if not ufo.spawned and not stop:
+            if not ufo.spawned:
+                ufo.timers = game.timers
                 ufo.spawn(game.get_world_size())
                 game.ufos.add(ufo)
                 game.arrows.add(ufo.arrow)
                 game.add_to_world(ufo, ufo.arrow)
-                pygame.time.set_timer(SPAWN_UFO, random.randrange(500 - (self.number * 2), 2000 - (self.number * 2)))
-                stop = True
-
-    def event_handler(self, event, game):
-        if game.state == "running":
-            if event.type == SPAWN_ASTEROID:
-                self.spawn_asteroid(game)
-                pygame.event.post(pygame.event.Event(game.ASTEROID_SPAWN))
-            if event.type == SPAWN_UFO:
-                self.spawn_ufo(game)
+                game.timers.schedule(random.randrange(500 - (self.number * 2), 2000 - (self.number * 2)) / 1000, self.spawn_ufo, game)
+                break
 
     def update(self):
         asteroidsLeft = False
@@ -88,9 +88,13 @@ class Wave:
 
 class WaveSystem:
     def __init__(self, game):
+        self.game = game
+        self.reset()
+
+    # goes back to before the first wave
+    def reset(self):
         self.waveNumber = 0
         self.wave = Wave(self.waveNumber, 20, 8)
-        self.game = game
 
     def calculate_max_enemies(self):
         wave_calculation = int(0.5 * (self.waveNumber + 4)**2 + 0.5 * (self.waveNumber + 4))
@@ -103,6 +107,3 @@ class WaveSystem:
             waveNumberText.change_text(str(self.waveNumber))
             self.wave = Wave(self.waveNumber, self.calculate_max_enemies(), self.calculate_max_enemies())
             self.wave.start_wave(self.game)
-
-    def event_handler(self, event):
-        self.wave.event_handler(event, self.game)